@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Asyncio Export API for Figure-Serving Services
+
+This module exports figures from async code without blocking the event
+loop. Rendering runs on a bounded thread or process pool; a queue-depth
+limit applies backpressure instead of piling up renders, requests can time
+out or be cancelled, and identical in-flight requests share one render.
+"""
+
+import asyncio
+import os
+import weakref
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Union
+
+import matplotlib.pyplot as plt
+
+from batch_export import _init_worker, _job_spec, _run_export_job
+from figure_export import save_publication_figure
+
+
+class ExportQueueFull(RuntimeError):
+    """Raised when the export queue is full and the caller chose not to wait."""
+
+
+class AsyncFigureExporter:
+    """
+    Bounded, coalescing executor for figure exports in asyncio services.
+
+    Parameters
+    ----------
+    max_workers : int, default 4
+        Number of concurrent renders
+    max_queue : int, default 32
+        Maximum number of queued plus running renders. Further requests wait
+        for a free slot, or raise ExportQueueFull with ``wait=False``.
+    executor : str, default 'thread'
+        'thread' renders Figure objects in threads of this process. Renders
+        of the same Figure run one at a time, since savefig changes the
+        figure's DPI and layout while it runs.
+        'process' renders batch_export job dicts in worker processes,
+        isolating matplotlib state and using all cores
+    timeout : float, optional
+        Default per-request timeout in seconds
+
+    Examples
+    --------
+    >>> exporter = AsyncFigureExporter(max_workers=4, max_queue=16)
+    >>> paths = await exporter.export_figure(fig, 'figure1', formats=['png'], timeout=10)
+    >>> await exporter.close()
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 32,
+        executor: str = 'thread',
+        timeout: Optional[float] = None
+    ):
+        if executor == 'thread':
+            self._executor: Executor = ThreadPoolExecutor(max_workers=max_workers)
+        elif executor == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_worker,
+                initargs=(max(1, (os.cpu_count() or 1) // max_workers),))
+        else:
+            raise ValueError(f"Executor '{executor}' not recognized. Available: thread, process")
+
+        self.executor_kind = executor
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._figure_locks: 'weakref.WeakKeyDictionary[plt.Figure, asyncio.Lock]' = \
+            weakref.WeakKeyDictionary()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of queue slots taken by renders that are queued or running."""
+        return self._queued
+
+    async def export_figure(
+        self,
+        figure: Union[plt.Figure, Dict[str, Any]],
+        filename: Optional[Union[str, Path]] = None,
+        *,
+        key: Optional[Hashable] = None,
+        timeout: Optional[float] = None,
+        wait: bool = True,
+        **save_kwargs
+    ) -> List[Path]:
+        """
+        Export a figure without blocking the event loop.
+
+        Parameters
+        ----------
+        figure : matplotlib.figure.Figure or dict
+            Figure to save (thread executor), or a job dict as accepted by
+            batch_export.export_batch() (either executor)
+        filename : str or Path, optional
+            Base filename (without extension); taken from the job dict if omitted
+        key : hashable, optional
+            Identity of the request for coalescing. Defaults to the figure
+            object (or a hash of the job's plot function, data and export
+            settings) together with the filename and ``save_kwargs``, so
+            duplicate requests share one render.
+        timeout : float, optional
+            Seconds to wait for the result (default: the exporter's timeout).
+            A timed-out render keeps its queue slot until it finishes.
+        wait : bool, default True
+            If False, raise ExportQueueFull instead of waiting for a slot
+        **save_kwargs
+            Arguments passed to save_publication_figure()
+
+        Returns
+        -------
+        list of Path
+            Paths of the saved files
+        """
+        if isinstance(figure, dict):
+            job = dict(figure)
+            if filename is not None:
+                job['filename'] = filename
+            if save_kwargs:
+                job['save_kwargs'] = {**job.get('save_kwargs', {}), **save_kwargs}
+            identity = (_job_spec(job), str(job['filename']))
+        else:
+            if self.executor_kind == 'process':
+                raise ValueError("The process executor needs a job dict, not a Figure")
+            if filename is None:
+                raise ValueError("A filename is required when exporting a Figure")
+            job = None
+            identity = id(figure)
+
+        if key is None:
+            key = (identity, str(filename), repr(sorted(save_kwargs.items())))
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_queue)
+
+        loop = asyncio.get_running_loop()
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        task = self._in_flight.get(key)
+        if task is None:
+            if not wait and self._slots.locked():
+                raise ExportQueueFull(f"Export queue is full ({self.max_queue} renders)")
+            # The timeout covers waiting for a queue slot as well as rendering
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+
+            # Another request may have started the same render while waiting
+            task = self._in_flight.get(key)
+            if task is None:
+                task = loop.create_task(
+                    self._render(figure, filename, job, save_kwargs))
+                self._queued += 1
+                self._in_flight[key] = task
+                task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            else:
+                self._slots.release()
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            remaining = max(deadline - loop.time(), 0) if deadline is not None else None
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] == 0:
+                del self._waiters[key]
+                if not task.done():
+                    # Nobody is waiting any more; drop the render if it has not started.
+                    # New requests for the same key start a fresh render.
+                    if self._in_flight.get(key) is task:
+                        del self._in_flight[key]
+                    task.cancel()
+
+    async def _render(
+        self,
+        figure: Union[plt.Figure, Dict[str, Any]],
+        filename: Optional[Union[str, Path]],
+        job: Optional[Dict[str, Any]],
+        save_kwargs: Dict[str, Any]
+    ) -> List[Path]:
+        """Run one render on the executor, one render per Figure at a time."""
+        if job is not None:
+            return await self._run(self._executor.submit(_run_export_job, job))
+
+        lock = self._figure_locks.get(figure)
+        if lock is None:
+            lock = self._figure_locks[figure] = asyncio.Lock()
+        async with lock:
+            return await self._run(
+                self._executor.submit(save_publication_figure, figure, filename, **save_kwargs))
+
+    async def _run(self, future: Future) -> List[Path]:
+        """Await an executor future, keeping its queue slot until it really ends."""
+        try:
+            paths = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                # Already rendering: keep the queue slot until it really ends
+                await asyncio.wait([asyncio.wrap_future(future)])
+            raise
+
+        return [Path(path) for path in paths]
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Release the queue slot of a finished render."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._queued -= 1
+        self._slots.release()
+
+    async def close(self) -> None:
+        """Cancel pending renders and shut down the executor."""
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self._executor.shutdown(wait=True, cancel_futures=True))
+
+    async def __aenter__(self) -> 'AsyncFigureExporter':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+# One default exporter per event loop; its queue slots belong to that loop
+_default_exporters: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncFigureExporter]' = \
+    weakref.WeakKeyDictionary()
+
+
+async def export_figure(
+    figure: Union[plt.Figure, Dict[str, Any]],
+    filename: Optional[Union[str, Path]] = None,
+    **kwargs
+) -> List[Path]:
+    """
+    Export a figure from async code using a shared default exporter.
+
+    Each event loop gets its own default exporter, so this also works
+    across successive asyncio.run() calls.
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure or dict
+        Figure or batch_export job dict
+    filename : str or Path, optional
+        Base filename (without extension)
+    **kwargs
+        ``key``, ``timeout``, ``wait`` and save_publication_figure()
+        arguments (see AsyncFigureExporter.export_figure)
+
+    Returns
+    -------
+    list of Path
+        Paths of the saved files
+
+    Examples
+    --------
+    >>> paths = await export_figure(fig, 'figure1', formats=['png'], dpi=300, timeout=5)
+    """
+    loop = asyncio.get_running_loop()
+    exporter = _default_exporters.get(loop)
+    if exporter is None:
+        exporter = _default_exporters[loop] = AsyncFigureExporter()
+    return await exporter.export_figure(figure, filename, **kwargs)
+
+
+if __name__ == "__main__":
+    # Example usage
+    import matplotlib
+    import numpy as np
+    matplotlib.use('Agg')
+
+    async def main():
+        fig, ax = plt.subplots(figsize=(3.5, 2.5))
+        x = np.linspace(0, 10, 100)
+        ax.plot(x, np.sin(x))
+
+        async with AsyncFigureExporter(max_workers=2, max_queue=4, timeout=30) as exporter:
+            # Identical requests share a single render
+            results = await asyncio.gather(*[
+                exporter.export_figure(fig, 'example_async', formats=['png'], dpi=300)
+                for _ in range(3)
+            ])
+            print(f"{len(results)} requests, files: {results[0]}")
+
+        plt.close(fig)
+
+    asyncio.run(main())
@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+"""
+Batch Export Utilities for Publication-Ready Scientific Figures
+
+This module renders and exports many figures in parallel worker processes.
+Large NumPy arrays are handed to the workers through shared memory or
+memory-mapped .npy files, so each worker reads a zero-copy view of the data
+instead of unpickling its own copy. Jobs are admitted under a per-node
+memory budget from an estimate of their peak rendering memory, so several
+high-DPI exports never run out of memory together. An optional checkpoint
+journal records every committed file, so a restarted batch only renders
+the figures that are not finished yet.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from figure_export import (
+    JOURNAL_EXPORT_SPECS,
+    JOURNAL_SIZE_SPECS,
+    VECTOR_FORMATS,
+    VECTOR_MAX_DPI,
+    save_for_journal,
+    save_publication_figure,
+)
+
+
+# Arrays smaller than this are pickled as usual; copying them is cheaper
+# than creating a shared memory segment.
+SHARE_THRESHOLD_BYTES = 1024 * 1024
+
+# Peak memory of a save, in multiples of the RGBA canvas at the export DPI.
+# Measured for a full-page line plot saved with bbox_inches='tight': about
+# 1.7 canvases for PNG/TIFF (the canvas plus the encoder's copy) and under
+# half a VECTOR_MAX_DPI canvas for PDF/EPS.
+RASTER_CANVAS_COPIES = 2
+VECTOR_CANVAS_COPIES = 1
+
+# Extra canvases for resampling a full-page imshow into the output, in
+# either kind of format (measured 4.4-4.6). Added for jobs with 2-D data.
+IMAGE_CANVAS_COPIES = 5
+
+# Copies plot functions typically make of their input arrays: 1-D arrays are
+# copied by plot() and friends, 2-D arrays by imshow normalization and
+# resampling in float64 (measured 5.5-10 for 9-36 megapixel images).
+DATA_COPIES = 2
+IMAGE_DATA_COPIES = 8
+
+# Resident memory of an idle worker with NumPy and matplotlib imported
+WORKER_BASELINE_BYTES = 128 * 1024 * 1024
+
+# Share of the node's memory used as the default budget
+MEMORY_BUDGET_FRACTION = 0.75
+
+
+class SharedArray(NamedTuple):
+    """Picklable reference to an array held in shared memory or a .npy file."""
+
+    kind: str  # 'shm' or 'npy'
+    name: str  # Shared memory segment name or .npy file path
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SharedArrayPool:
+    """
+    Owner of the shared memory segments created for a batch.
+
+    Segments are unlinked when the pool is closed, whether or not the
+    workers that attached to them finished cleanly. Use it as a context
+    manager so cleanup also happens when the batch raises.
+
+    Examples
+    --------
+    >>> with SharedArrayPool() as pool:
+    ...     ref = pool.share(np.random.rand(4000, 4000))
+    ...     # pass ``ref`` to worker processes, then call attach_array(ref)
+    """
+
+    def __init__(self):
+        self._segments: List[shared_memory.SharedMemory] = []
+
+    def share(self, array: np.ndarray) -> SharedArray:
+        """
+        Copy an array into a new shared memory segment.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Array to share. It is copied once into the segment.
+
+        Returns
+        -------
+        SharedArray
+            Reference that workers pass to attach_array()
+        """
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._segments.append(shm)
+
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        view[...] = array
+        del view
+
+        return SharedArray('shm', shm.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        """Close and unlink every segment owned by the pool."""
+        while self._segments:
+            shm = self._segments.pop()
+            try:
+                shm.close()
+            except BufferError:
+                # A view is still alive in this process; unlinking below
+                # still releases the segment once that view is dropped.
+                pass
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> 'SharedArrayPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def memmap_array(
+    array: Union[np.ndarray, str, Path],
+    path: Optional[Union[str, Path]] = None
+) -> SharedArray:
+    """
+    Reference an array through a memory-mapped .npy file.
+
+    Unlike shared memory, the file outlives the batch, so it is the right
+    choice for data that is reused across runs or read by several batches.
+
+    Parameters
+    ----------
+    array : numpy.ndarray, str or Path
+        Array to write, or path of an existing .npy file to reference
+    path : str or Path, optional
+        Destination .npy file when ``array`` is an ndarray
+
+    Returns
+    -------
+    SharedArray
+        Reference that workers pass to attach_array()
+
+    Examples
+    --------
+    >>> ref = memmap_array('heatmap.npy')
+    >>> ref = memmap_array(np.random.rand(1000, 1000), 'cache/heatmap.npy')
+    """
+    if isinstance(array, (str, Path)):
+        path = Path(array)
+    else:
+        if path is None:
+            raise ValueError("A destination path is required when passing an array")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, np.ascontiguousarray(array))
+
+    mapped = np.load(path, mmap_mode='r')
+    return SharedArray('npy', str(path), mapped.shape, mapped.dtype.str)
+
+
+def attach_array(ref: SharedArray) -> Tuple[np.ndarray, Optional[shared_memory.SharedMemory]]:
+    """
+    Open a zero-copy, read-only view of a shared array.
+
+    Parameters
+    ----------
+    ref : SharedArray
+        Reference created by SharedArrayPool.share() or memmap_array()
+
+    Returns
+    -------
+    tuple
+        ``(array, segment)``. ``segment`` is the attached SharedMemory
+        (None for .npy files) and must stay referenced while ``array`` is
+        in use; close it afterwards but never unlink it.
+    """
+    if ref.kind == 'npy':
+        return np.load(ref.name, mmap_mode='r'), None
+
+    if ref.kind != 'shm':
+        raise ValueError(f"Unknown shared array kind '{ref.kind}'. Available: shm, npy")
+
+    shm = shared_memory.SharedMemory(name=ref.name)
+    array = np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf)
+    array.flags.writeable = False
+    return array, shm
+
+
+def _hash_value(value: Any, digest) -> None:
+    """Feed a stable representation of a job or panel input into a hash."""
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray{value.shape}{value.dtype.str}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, SharedArray) and value.kind == 'npy':
+        # Identify the file by its size and modification time, not its contents
+        try:
+            stat = os.stat(value.name)
+            digest.update(f"npy{value.name}{stat.st_size}{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"npy{value.name}".encode())
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value, key=str):
+            _hash_value(key, digest)
+            _hash_value(value[key], digest)
+    elif isinstance(value, (list, tuple)):
+        digest.update(type(value).__name__.encode())
+        for item in value:
+            _hash_value(item, digest)
+    elif isinstance(value, (set, frozenset)):
+        digest.update(type(value).__name__.encode())
+        for item in sorted(value, key=repr):
+            _hash_value(item, digest)
+    elif value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(repr(value).encode())
+    else:
+        # Other objects (e.g. pandas data) by content; their reprs are truncated.
+        # Large buffers are hashed out of band instead of being copied.
+        buffers = []
+        try:
+            digest.update(pickle.dumps(value, protocol=5, buffer_callback=buffers.append))
+        except Exception as e:
+            raise TypeError(f"Cannot hash {type(value).__name__} for caching; "
+                            f"pass picklable data") from e
+        for buffer in buffers:
+            digest.update(buffer.raw())
+
+
+def _share_job_data(
+    data: Dict[str, Any],
+    pool: SharedArrayPool,
+    share_threshold: int
+) -> Dict[str, Any]:
+    """Replace large arrays in a job's data with shared references."""
+    shared = {}
+    for key, value in data.items():
+        if isinstance(value, np.ndarray) and value.nbytes >= share_threshold:
+            shared[key] = pool.share(value)
+        else:
+            shared[key] = value
+    return shared
+
+
+def estimate_job_memory(job: Dict[str, Any]) -> int:
+    """
+    Estimate the peak memory needed to render and save one export job.
+
+    The figure size is taken from the job's 'figsize' (inches). Without it,
+    the largest page of the job's journal (double column, full height) is
+    assumed, as check_figure_size() would accept it. Formats are saved one
+    after another, so the largest format determines the peak. Jobs with 2-D
+    data arrays are assumed to draw them as images, which costs extra
+    canvases for resampling.
+
+    Parameters
+    ----------
+    job : dict
+        Export job as accepted by export_batch(), optionally with 'figsize'
+
+    Returns
+    -------
+    int
+        Estimated peak memory in bytes, excluding the worker's baseline
+
+    Examples
+    --------
+    >>> job = {'filename': 'fig1', 'journal': 'acs', 'figure_type': 'combination',
+    ...        'figsize': (178 / 25.4, 247 / 25.4)}
+    >>> round(estimate_job_memory(job) / 2**20)  # 600 DPI TIFF, in MB
+    187
+    """
+    if 'journal' in job:
+        journal = job['journal'].lower()
+        figure_type = job.get('figure_type', 'combination')
+        if figure_type not in JOURNAL_EXPORT_SPECS.get(journal, {}):
+            raise ValueError(f"No export requirements for journal '{job['journal']}' "
+                             f"and figure type '{figure_type}'")
+        specs = JOURNAL_EXPORT_SPECS[journal][figure_type]
+        formats, dpi = specs['formats'], specs['dpi']
+    else:
+        save_kwargs = job.get('save_kwargs', {})
+        formats, dpi = save_kwargs.get('formats', ['pdf', 'png']), save_kwargs.get('dpi', 300)
+        journal = 'nature'
+
+    if 'figsize' in job:
+        width_inches, height_inches = job['figsize']
+    else:
+        page = JOURNAL_SIZE_SPECS.get(journal, JOURNAL_SIZE_SPECS['nature'])
+        width_inches, height_inches = page['double'] / 25.4, page['max_height'] / 25.4
+
+    data_bytes = 0
+    has_images = False
+    for value in job.get('data', {}).values():
+        if isinstance(value, np.ndarray):
+            shape, nbytes = value.shape, value.nbytes
+        elif isinstance(value, SharedArray):
+            shape = value.shape
+            nbytes = int(np.prod(shape)) * np.dtype(value.dtype).itemsize
+        else:
+            continue
+        is_image = len(shape) >= 2
+        has_images |= is_image
+        data_bytes += (IMAGE_DATA_COPIES if is_image else DATA_COPIES) * nbytes
+
+    peak = 0
+    for fmt in formats:
+        if fmt in VECTOR_FORMATS:
+            fmt_dpi, copies = min(dpi, VECTOR_MAX_DPI), VECTOR_CANVAS_COPIES
+        else:
+            fmt_dpi, copies = dpi, RASTER_CANVAS_COPIES
+        if has_images:
+            copies += IMAGE_CANVAS_COPIES
+        canvas_bytes = int(width_inches * fmt_dpi) * int(height_inches * fmt_dpi) * 4
+        peak = max(peak, copies * canvas_bytes)
+
+    return peak + data_bytes
+
+
+def _default_memory_budget() -> Optional[int]:
+    """MEMORY_BUDGET_FRACTION of the node's (or container's) memory."""
+    try:
+        total = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+    # A cgroup limit is what the OOM killer enforces inside containers
+    try:
+        limit = Path('/sys/fs/cgroup/memory.max').read_text().strip()
+        if limit != 'max':
+            total = min(total, int(limit))
+    except (OSError, ValueError):
+        pass
+
+    return int(total * MEMORY_BUDGET_FRACTION)
+
+
+def _init_worker(tex_processes: Optional[int] = None) -> None:
+    """Use a non-interactive backend in every worker process."""
+    matplotlib.use('Agg')
+    if tex_processes is not None:
+        # Share the CPUs with the other workers when compiling LaTeX labels
+        import latex_text
+        latex_text.MAX_TEX_PROCESSES = tex_processes
+
+
+def _run_export_job(job: Dict[str, Any]) -> List[str]:
+    """Render one figure in a worker process and save it."""
+    data = {}
+    segments = []
+    for key, value in job.get('data', {}).items():
+        if isinstance(value, SharedArray):
+            value, shm = attach_array(value)
+            if shm is not None:
+                segments.append(shm)
+        data[key] = value
+
+    fig = None
+    try:
+        fig = job['plot_func'](**data)
+
+        if 'journal' in job:
+            saved = save_for_journal(
+                fig=fig,
+                filename=job['filename'],
+                journal=job['journal'],
+                figure_type=job.get('figure_type', 'combination'),
+                deterministic=job.get('deterministic', False)
+            )
+        else:
+            saved = save_publication_figure(fig, job['filename'], **job.get('save_kwargs', {}))
+
+        return [str(path) for path in saved]
+    finally:
+        if fig is not None:
+            plt.close(fig)
+        del data
+        for shm in segments:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+def _job_spec(job: Dict[str, Any]) -> str:
+    """Hash of everything that determines a job's output files."""
+    digest = hashlib.blake2b(digest_size=16)
+    plot_func = job['plot_func']
+    digest.update(f"{plot_func.__module__}.{plot_func.__qualname__}".encode())
+    try:
+        digest.update(inspect.getsource(plot_func).encode())
+    except (OSError, TypeError):
+        pass
+    _hash_value(job.get('data', {}), digest)
+    _hash_value({key: job[key] for key in ('journal', 'figure_type', 'deterministic', 'save_kwargs')
+                 if key in job}, digest)
+    return digest.hexdigest()
+
+
+def _job_outputs(job: Dict[str, Any]) -> Dict[str, Path]:
+    """Files a job writes, by format."""
+    if 'journal' in job:
+        journal = job['journal'].lower()
+        formats = JOURNAL_EXPORT_SPECS[journal][job.get('figure_type', 'combination')]['formats']
+    else:
+        formats = job.get('save_kwargs', {}).get('formats', ['pdf', 'png'])
+    filename = Path(job['filename'])
+    return {fmt: filename.parent / f"{filename.stem}.{fmt}" for fmt in formats}
+
+
+def _file_sha256(path: Union[str, Path]) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _run_checkpointed_job(job: Dict[str, Any]) -> List[Tuple[str, int, str]]:
+    """Run an export job and describe each saved file by path, size and hash."""
+    return [(path, os.path.getsize(path), _file_sha256(path)) for path in _run_export_job(job)]
+
+
+def load_checkpoint(checkpoint: Union[str, Path]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Read a batch checkpoint journal.
+
+    Parameters
+    ----------
+    checkpoint : str or Path
+        Journal written by export_batch(checkpoint=...)
+
+    Returns
+    -------
+    dict
+        Latest entry per ``(figure, format)`` with 'figure', 'format',
+        'spec', 'path', 'size' and 'sha256'. Empty if the journal does not
+        exist. A line cut short by a crash is ignored.
+    """
+    entries = {}
+    try:
+        with open(checkpoint, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[(entry['figure'], entry['format'])] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _checkpointed_outputs(
+    job: Dict[str, Any],
+    spec: str,
+    entries: Dict[Tuple[str, str], Dict[str, Any]]
+) -> Optional[List[Path]]:
+    """Paths of a job's outputs if the journal shows them complete and intact."""
+    name = str(job['filename'])
+    paths = []
+    for fmt, path in _job_outputs(job).items():
+        entry = entries.get((name, fmt))
+        if entry is None or entry['spec'] != spec or entry['path'] != str(path):
+            return None
+        try:
+            if os.path.getsize(path) != entry['size'] or _file_sha256(path) != entry['sha256']:
+                return None
+        except OSError:
+            return None
+        paths.append(path)
+    return paths
+
+
+def _append_checkpoint(
+    checkpoint: Path,
+    name: str,
+    spec: str,
+    saved: List[Tuple[str, int, str]]
+) -> None:
+    """Append the committed files of one job to the journal and flush it to disk."""
+    lines = []
+    for path, size, sha256 in saved:
+        entry = {'figure': name, 'format': Path(path).suffix[1:], 'spec': spec,
+                 'path': path, 'size': size, 'sha256': sha256}
+        lines.append(json.dumps(entry) + '\n')
+    with open(checkpoint, 'a+b') as f:
+        # Start on a fresh line if a crash cut the last entry short
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                lines.insert(0, '\n')
+        f.write(''.join(lines).encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def export_batch(
+    jobs: List[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    share_threshold: int = SHARE_THRESHOLD_BYTES,
+    mp_context=None,
+    memory_budget: Optional[int] = None,
+    checkpoint: Optional[Union[str, Path]] = None
+) -> Dict[str, List[Path]]:
+    """
+    Render and export many figures in parallel worker processes.
+
+    Jobs are admitted largest first while their estimated memory (see
+    estimate_job_memory) fits in the budget left by the running jobs;
+    smaller jobs fill the remaining room so all workers stay busy.
+
+    Parameters
+    ----------
+    jobs : list of dict
+        One dict per figure with the keys:
+
+        - 'plot_func': module-level function that builds and returns a Figure
+        - 'data': dict of keyword arguments passed to ``plot_func``
+        - 'filename': base filename (without extension)
+        - 'journal' and optional 'figure_type' and 'deterministic':
+          export with save_for_journal()
+        - 'save_kwargs': otherwise, arguments for save_publication_figure()
+        - 'figsize': optional figure size in inches, for the memory estimate
+
+        NumPy arrays in 'data' of at least ``share_threshold`` bytes are
+        placed in shared memory; SharedArray references from
+        memmap_array() are passed through as they are.
+    max_workers : int, optional
+        Number of worker processes (default: number of CPUs)
+    share_threshold : int, default SHARE_THRESHOLD_BYTES
+        Minimum array size in bytes to hand over through shared memory
+    mp_context : multiprocessing context, optional
+        Start method context for the process pool
+    memory_budget : int, optional
+        Memory in bytes that the workers may use together (default:
+        MEMORY_BUDGET_FRACTION of the node's memory). Jobs estimated to
+        need more than the budget on their own are not run. If a worker
+        dies, the jobs running at that moment are rerun one at a time and
+        only a job that crashes on its own is reported as failed.
+    checkpoint : str or Path, optional
+        Append-only journal recording each job's files (format, export
+        spec, size and SHA-256) as they are committed. Jobs whose recorded
+        files are present and intact are skipped without rendering, so a
+        crashed batch resumes where it stopped. Changing a job's plot
+        function, data or export settings makes it render again.
+
+    Returns
+    -------
+    dict
+        Mapping of each job's filename to the list of saved paths.
+        Failed jobs map to an empty list.
+
+    Examples
+    --------
+    >>> def plot_heatmap(matrix):
+    ...     fig, ax = plt.subplots(figsize=(3.5, 3))
+    ...     ax.imshow(matrix, cmap='viridis')
+    ...     return fig
+    >>> jobs = [{'plot_func': plot_heatmap, 'data': {'matrix': m},
+    ...          'filename': f'heatmap_{i}', 'journal': 'nature', 'figsize': (3.5, 3)}
+    ...         for i, m in enumerate(matrices)]
+    >>> export_batch(jobs, max_workers=4, memory_budget=8 * 2**30)
+    >>> export_batch(jobs, checkpoint='figures/.export-checkpoint.jsonl')  # resumable
+    """
+    results: Dict[str, List[Path]] = {str(job['filename']): [] for job in jobs}
+
+    n_workers = max_workers or os.cpu_count() or 1
+    if memory_budget is None:
+        memory_budget = _default_memory_budget()
+
+    job_budget = None
+    if memory_budget is not None:
+        job_budget = memory_budget - n_workers * WORKER_BASELINE_BYTES
+        if job_budget <= 0:
+            raise ValueError(f"Memory budget of {memory_budget / 2**20:.0f} MB does not cover "
+                             f"the baseline of {n_workers} worker(s); use fewer workers")
+
+    estimates = {}
+    specs = {}
+    entries = load_checkpoint(checkpoint) if checkpoint is not None else {}
+    for index, job in enumerate(jobs):
+        try:
+            estimates[index] = estimate_job_memory(job)
+        except ValueError as e:
+            print(f"✗ Not exporting {job['filename']}: {e}")
+            continue
+
+        if checkpoint is not None:
+            specs[index] = _job_spec(job)
+            finished = _checkpointed_outputs(job, specs[index], entries)
+            if finished is not None:
+                results[str(job['filename'])] = finished
+                print(f"= Checkpointed: {job['filename']}")
+                del estimates[index]
+
+    with SharedArrayPool() as pool:
+        # Largest jobs first, so small ones are packed around them
+        pending: Dict[int, Dict[str, Any]] = {}
+        for index in sorted(estimates, key=estimates.get, reverse=True):
+            name = str(jobs[index]['filename'])
+            if job_budget is not None and estimates[index] > job_budget:
+                print(f"✗ Not exporting {name}: needs about {estimates[index] / 2**20:.0f} MB, "
+                      f"more than the {job_budget / 2**20:.0f} MB budget")
+                continue
+
+            job = dict(jobs[index])
+            job['data'] = _share_job_data(job.get('data', {}), pool, share_threshold)
+            pending[index] = job
+
+        budget_note = f" within {memory_budget / 2**20:.0f} MB" if memory_budget is not None else ''
+        print(f"Exporting {len(pending)} figure(s) with {n_workers} worker(s){budget_note}...")
+
+        run_job = _run_checkpointed_job if checkpoint is not None else _run_export_job
+
+        def new_pool() -> ProcessPoolExecutor:
+            return ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context,
+                                       initializer=_init_worker,
+                                       initargs=(max(1, (os.cpu_count() or 1) // n_workers),))
+
+        # A dead worker (e.g. OOM-killed) breaks the whole pool. The jobs that
+        # were running then rerun one at a time in a fresh pool, so only the
+        # job that crashes on its own is reported as failed.
+        suspects = set()
+        retry: List[str] = []
+        prepared = dict(pending)
+        running: Dict[Future, int] = {}
+        in_use = 0
+        executor = new_pool()
+
+        def finish(future: Future) -> bool:
+            """Record a finished job; return True if its worker crashed."""
+            nonlocal in_use
+            index = running.pop(future)
+            in_use -= estimates[index]
+            name = str(jobs[index]['filename'])
+            try:
+                saved = future.result()
+            except BrokenProcessPool as e:
+                if index in suspects:
+                    print(f"✗ Worker crashed while exporting {name}: {e}")
+                else:
+                    suspects.add(index)
+                    pending[index] = prepared[index]
+                    retry.append(name)
+                return True
+            except Exception as e:
+                print(f"✗ Failed to export {name}: {e}")
+                return False
+
+            if checkpoint is not None:
+                _append_checkpoint(Path(checkpoint), name, specs[index], saved)
+                saved = [path for path, _, _ in saved]
+            results[name] = [Path(path) for path in saved]
+            return False
+
+        try:
+            while pending or running:
+                broken = False
+
+                if any(index in suspects for index in pending):
+                    # Rerun a suspect alone, once the running jobs are done
+                    admissible = [] if running else [next(i for i in pending if i in suspects)]
+                elif any(index in suspects for index in running.values()):
+                    admissible = []
+                else:
+                    admissible = list(pending)
+
+                # Admit every pending job that fits next to the running ones
+                for index in admissible:
+                    if len(running) >= n_workers:
+                        break
+                    if job_budget is not None and in_use + estimates[index] > job_budget:
+                        continue
+                    try:
+                        future = executor.submit(run_job, pending[index])
+                    except BrokenProcessPool:
+                        broken = True
+                        break
+                    del pending[index]
+                    running[future] = index
+                    in_use += estimates[index]
+
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        broken |= finish(future)
+
+                if broken:
+                    # Every other running job fails with the pool; collect them
+                    for future in list(running):
+                        wait([future])
+                        finish(future)
+                    if retry:
+                        print(f"! Worker crashed; rerunning one at a time: {', '.join(retry)}")
+                        retry.clear()
+                    executor.shutdown(wait=True)
+                    executor = new_pool()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    return results
+
+
+def _example_heatmap(matrix: np.ndarray) -> plt.Figure:
+    """Example plot function used by the __main__ demo."""
+    fig, ax = plt.subplots(figsize=(3.5, 3))
+    im = ax.imshow(matrix, cmap='viridis', aspect='auto')
+    fig.colorbar(im, ax=ax, label='Value')
+    ax.set_xlabel('Column')
+    ax.set_ylabel('Row')
+    return fig
+
+
+if __name__ == "__main__":
+    # Example usage
+    rng = np.random.default_rng(0)
+    jobs = [
+        {
+            'plot_func': _example_heatmap,
+            'data': {'matrix': rng.random((2000, 2000))},
+            'filename': f'example_heatmap_{i}',
+            'figsize': (3.5, 3),
+            'save_kwargs': {'formats': ['png'], 'dpi': 300},
+        }
+        for i in range(4)
+    ]
+
+    results = export_batch(jobs, max_workers=2, memory_budget=2 * 2**30)
+    for name, paths in results.items():
+        print(f"{name}: {', '.join(str(p) for p in paths) or 'failed'}")
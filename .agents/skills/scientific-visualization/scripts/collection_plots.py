@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Collection-Based Plotting Helpers for Publication-Ready Scientific Figures
+
+This module provides vectorized versions of the error bar, bar, box plot,
+individual point and significance marker patterns from the examples. Each
+helper draws a whole series with a fixed number of collection artists
+instead of one artist per group, bar or point, so draw and PDF export time
+scale with the data rather than with the number of Python objects.
+
+Line widths, marker sizes and colors follow the active style preset
+(see style_presets.apply_publication_style).
+"""
+
+import weakref
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
+from typing import List, Optional, Sequence, Tuple, Union
+
+
+ColorSpec = Union[str, Sequence]
+
+# Number of default-colored series these helpers drew on each axes
+_SERIES_COUNTS: 'weakref.WeakKeyDictionary[plt.Axes, int]' = weakref.WeakKeyDictionary()
+
+
+def _series_color(ax: plt.Axes, color: Optional[ColorSpec]) -> ColorSpec:
+    """
+    Use the next color of the active palette if none is given.
+
+    Series drawn by these helpers on the same axes take successive colors of
+    ``axes.prop_cycle``, like _group_colors. This count is separate from the
+    cycle ax.plot() advances, so pass colors explicitly when mixing both.
+    """
+    if color is not None:
+        return color
+    palette = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    index = _SERIES_COUNTS.get(ax, 0)
+    _SERIES_COUNTS[ax] = index + 1
+    return palette[index % len(palette)]
+
+
+def _group_colors(ax: plt.Axes, colors: Optional[ColorSpec], n: int) -> np.ndarray:
+    """RGBA colors for ``n`` groups, cycling the active palette by default."""
+    if colors is None:
+        colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    rgba = to_rgba_array(colors)
+    return rgba[np.arange(n) % len(rgba)]
+
+
+def errorbars(
+    ax: plt.Axes,
+    x: Sequence[float],
+    y: Sequence[float],
+    yerr: Union[Sequence[float], Tuple[Sequence[float], Sequence[float]]],
+    color: Optional[ColorSpec] = None,
+    marker: Optional[str] = 'o',
+    markersize: Optional[float] = None,
+    linewidth: Optional[float] = None,
+    capsize: Optional[float] = None,
+    label: Optional[str] = None
+) -> Tuple[LineCollection, PathCollection, Optional[PathCollection]]:
+    """
+    Draw error bars for a whole series with three artists.
+
+    Equivalent to ``ax.errorbar(x, y, yerr=yerr, fmt='o', capsize=3)``.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw into
+    x, y : array-like
+        Positions and central values (e.g. means)
+    yerr : array-like or (lower, upper)
+        Symmetric error, or separate lower and upper errors
+    color : color, optional
+        Series color (default: next color of the palette)
+    marker : str or None, default 'o'
+        Marker of the central values; None for bars only
+    markersize : float, optional
+        Marker size in points (default: ``lines.markersize``)
+    linewidth : float, optional
+        Error bar width (default: ``lines.linewidth``)
+    capsize : float, optional
+        Cap length in points (default: ``errorbar.capsize``, or 3 if unset)
+    label : str, optional
+        Legend label
+
+    Returns
+    -------
+    tuple
+        ``(bars, caps, markers)``; ``markers`` is None without a marker
+
+    Examples
+    --------
+    >>> errorbars(ax, x_binned, means, sems, label='Condition A')
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    yerr = np.asarray(yerr, dtype=float)
+    lower, upper = (yerr[0], yerr[1]) if yerr.ndim == 2 else (yerr, yerr)
+
+    color = _series_color(ax, color)
+    linewidth = plt.rcParams['lines.linewidth'] if linewidth is None else linewidth
+    markersize = plt.rcParams['lines.markersize'] if markersize is None else markersize
+    if capsize is None:
+        capsize = plt.rcParams['errorbar.capsize'] or 3
+
+    segments = np.empty((len(x), 2, 2))
+    segments[:, 0, 0] = segments[:, 1, 0] = x
+    segments[:, 0, 1] = y - lower
+    segments[:, 1, 1] = y + upper
+    bars = LineCollection(segments, colors=color, linewidths=linewidth)
+    ax.add_collection(bars)
+
+    caps = ax.scatter(np.concatenate([x, x]), np.concatenate([y - lower, y + upper]),
+                      marker='_', s=(2 * capsize) ** 2, color=color, linewidths=linewidth)
+
+    markers = None
+    if marker is not None:
+        markers = ax.scatter(x, y, marker=marker, s=markersize ** 2, color=color,
+                             edgecolors='none', label=label, zorder=bars.get_zorder() + 0.1)
+    elif label is not None:
+        bars.set_label(label)
+
+    ax.autoscale_view()
+    return bars, caps, markers
+
+
+def bars(
+    ax: plt.Axes,
+    x: Sequence[float],
+    heights: Sequence[float],
+    width: float = 0.8,
+    bottom: Union[float, Sequence[float]] = 0,
+    colors: Optional[ColorSpec] = None,
+    alpha: Optional[float] = None,
+    edgecolor: ColorSpec = 'none',
+    label: Optional[str] = None
+) -> PolyCollection:
+    """
+    Draw a bar series as a single PolyCollection.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw into
+    x : array-like
+        Bar centers
+    heights : array-like
+        Bar heights
+    width : float, default 0.8
+        Bar width in data units
+    bottom : float or array-like, default 0
+        Bar baselines
+    colors : color or list of colors, optional
+        One color for the series, or one per bar (default: next palette color)
+    alpha : float, optional
+        Opacity
+    edgecolor : color, default 'none'
+        Outline color; outlines use ``axes.linewidth``
+    label : str, optional
+        Legend label
+
+    Returns
+    -------
+    matplotlib.collections.PolyCollection
+
+    Examples
+    --------
+    >>> x = np.arange(len(categories))
+    >>> bars(ax, x - 0.175, control_means, width=0.35, label='Control')
+    >>> errorbars(ax, x - 0.175, control_means, control_sem, color='black', marker=None)
+    """
+    x = np.asarray(x, dtype=float)
+    heights = np.asarray(heights, dtype=float)
+    bottom = np.broadcast_to(np.asarray(bottom, dtype=float), x.shape)
+
+    left, right = x - width / 2, x + width / 2
+    verts = np.stack([
+        np.stack([left, bottom], axis=-1),
+        np.stack([left, bottom + heights], axis=-1),
+        np.stack([right, bottom + heights], axis=-1),
+        np.stack([right, bottom], axis=-1),
+    ], axis=1)
+
+    facecolors = _series_color(ax, colors)
+    collection = PolyCollection(verts, facecolors=facecolors, edgecolors=edgecolor,
+                                linewidths=plt.rcParams['axes.linewidth'], alpha=alpha,
+                                label=label)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+def jittered_points(
+    ax: plt.Axes,
+    groups: Sequence[Sequence[float]],
+    positions: Optional[Sequence[float]] = None,
+    jitter: float = 0.04,
+    colors: Optional[ColorSpec] = None,
+    size: float = 8,
+    alpha: float = 0.4,
+    seed: Optional[int] = 0
+) -> PathCollection:
+    """
+    Overlay the individual points of all groups as a single PathCollection.
+
+    Equivalent to one ``ax.scatter`` call per group with jittered x positions.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw into
+    groups : list of array-like
+        Values of each group
+    positions : array-like, optional
+        Group centers on the x axis (default: 1, 2, ..., like ax.boxplot)
+    jitter : float, default 0.04
+        Standard deviation of the horizontal jitter
+    colors : color or list of colors, optional
+        One color per group (default: the active palette)
+    size : float, default 8
+        Marker area in points squared
+    alpha : float, default 0.4
+        Opacity
+    seed : int, optional
+        Seed for reproducible jitter
+
+    Returns
+    -------
+    matplotlib.collections.PathCollection
+
+    Examples
+    --------
+    >>> box_summary(ax, data)
+    >>> jittered_points(ax, data, colors=['#0072B2', '#E69F00', '#009E73', '#D55E00'])
+    """
+    counts = np.array([len(group) for group in groups])
+    if positions is None:
+        positions = np.arange(1, len(groups) + 1)
+    positions = np.asarray(positions, dtype=float)
+
+    values = np.concatenate([np.asarray(group, dtype=float) for group in groups])
+    group_index = np.repeat(np.arange(len(groups)), counts)
+    rng = np.random.default_rng(seed)
+    x = positions[group_index] + rng.normal(0, jitter, size=len(values))
+
+    facecolors = _group_colors(ax, colors, len(groups))[group_index]
+    return ax.scatter(x, values, s=size, c=facecolors, alpha=alpha, edgecolors='none')
+
+
+def box_summary(
+    ax: plt.Axes,
+    groups: Sequence[Sequence[float]],
+    positions: Optional[Sequence[float]] = None,
+    width: float = 0.5,
+    facecolor: ColorSpec = 'lightgray',
+    whis: float = 1.5
+) -> Tuple[PolyCollection, LineCollection, LineCollection]:
+    """
+    Draw box plots of all groups with three artists.
+
+    Boxes span the quartiles, whiskers reach the furthest points within
+    ``whis`` times the interquartile range, as with ``ax.boxplot``. Outliers
+    are not drawn; overlay all points with jittered_points(). NaN values
+    are ignored.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw into
+    groups : list of array-like
+        Values of each group; each needs at least one non-NaN value
+    positions : array-like, optional
+        Group centers on the x axis (default: 1, 2, ...)
+    width : float, default 0.5
+        Box width in data units
+    facecolor : color or list of colors, default 'lightgray'
+        Box fill
+    whis : float, default 1.5
+        Whisker reach in interquartile ranges
+
+    Returns
+    -------
+    tuple
+        ``(boxes, medians, whiskers)``
+    """
+    if positions is None:
+        positions = np.arange(1, len(groups) + 1)
+    positions = np.asarray(positions, dtype=float)
+
+    q1, median, q3, low, high = (np.empty(len(groups)) for _ in range(5))
+    for i, group in enumerate(groups):
+        group = np.asarray(group, dtype=float)
+        group = np.sort(group[~np.isnan(group)])
+        if len(group) == 0:
+            raise ValueError(f"Group {i} has no values to summarize")
+        q1[i], median[i], q3[i] = np.percentile(group, [25, 50, 75])
+        iqr = q3[i] - q1[i]
+        low[i] = group[group >= q1[i] - whis * iqr][0]
+        high[i] = group[group <= q3[i] + whis * iqr][-1]
+
+    linewidth = plt.rcParams['axes.linewidth']
+    left, right = positions - width / 2, positions + width / 2
+
+    box_verts = np.stack([
+        np.stack([left, q1], axis=-1), np.stack([left, q3], axis=-1),
+        np.stack([right, q3], axis=-1), np.stack([right, q1], axis=-1),
+    ], axis=1)
+    boxes = PolyCollection(box_verts, facecolors=facecolor, edgecolors='black',
+                           linewidths=linewidth)
+    ax.add_collection(boxes)
+
+    medians = LineCollection(np.stack([np.stack([left, median], axis=-1),
+                                       np.stack([right, median], axis=-1)], axis=1),
+                             colors='black', linewidths=linewidth * 3)
+    ax.add_collection(medians)
+
+    cap_left, cap_right = positions - width / 4, positions + width / 4
+    whisker_segments = np.concatenate([
+        np.stack([np.stack([positions, q1], -1), np.stack([positions, low], -1)], axis=1),
+        np.stack([np.stack([positions, q3], -1), np.stack([positions, high], -1)], axis=1),
+        np.stack([np.stack([cap_left, low], -1), np.stack([cap_right, low], -1)], axis=1),
+        np.stack([np.stack([cap_left, high], -1), np.stack([cap_right, high], -1)], axis=1),
+    ])
+    whiskers = LineCollection(whisker_segments, colors='black', linewidths=linewidth * 1.6)
+    ax.add_collection(whiskers)
+
+    ax.autoscale_view()
+    return boxes, medians, whiskers
+
+
+def significance_markers(
+    ax: plt.Axes,
+    comparisons: Sequence[Tuple[float, float, float, str]],
+    height: Optional[float] = None,
+    fontsize: Optional[float] = None
+) -> Tuple[LineCollection, List[plt.Text]]:
+    """
+    Draw significance brackets for many comparisons as one LineCollection.
+
+    Equivalent to calling ``add_significance_bar`` from the examples for each
+    comparison. Labels remain one text artist per comparison.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw into
+    comparisons : list of (x1, x2, y, text)
+        Bracket ends, bracket base height and label (e.g. '***')
+    height : float, optional
+        Bracket tick height in data units (default: 2% of the y range)
+    fontsize : float, optional
+        Label size (default: ``legend.fontsize``)
+
+    Returns
+    -------
+    tuple
+        ``(brackets, labels)``
+
+    Examples
+    --------
+    >>> significance_markers(ax, [(x[1] - width/2, x[1] + width/2, 135, '***'),
+    ...                           (x[2] - width/2, x[2] + width/2, 155, '***')])
+    """
+    if not comparisons:
+        raise ValueError("No comparisons given")
+
+    x1, x2, y = (np.array([c[i] for c in comparisons], dtype=float) for i in range(3))
+    if height is None:
+        ymin, ymax = ax.get_ylim()
+        height = 0.02 * (ymax - ymin)
+    if fontsize is None:
+        fontsize = plt.rcParams['legend.fontsize']
+
+    brackets = np.stack([
+        np.stack([x1, y], axis=-1),
+        np.stack([x1, y + height], axis=-1),
+        np.stack([x2, y + height], axis=-1),
+        np.stack([x2, y], axis=-1),
+    ], axis=1)
+    collection = LineCollection(brackets, colors='black',
+                                linewidths=plt.rcParams['axes.linewidth'] * 1.6)
+    ax.add_collection(collection)
+
+    labels = [ax.text((a + b) / 2, top + height, text, ha='center', va='bottom',
+                      fontsize=fontsize)
+              for a, b, top, (_, _, _, text) in zip(x1, x2, y, comparisons)]
+
+    ax.autoscale_view()
+    return collection, labels
+
+
+if __name__ == "__main__":
+    # Example usage: 300 groups with a handful of artists
+    import time
+    from style_presets import apply_publication_style
+
+    apply_publication_style('default')
+    rng = np.random.default_rng(42)
+    data = [rng.normal(100 + i % 7 * 5, 15, 30) for i in range(300)]
+
+    fig, ax = plt.subplots(figsize=(7, 3))
+    box_summary(ax, data, width=0.6)
+    jittered_points(ax, data, size=2)
+    means = np.array([d.mean() for d in data])
+    sems = np.array([d.std() / np.sqrt(len(d)) for d in data])
+    errorbars(ax, np.arange(1, 301), means, sems, color='black', markersize=2)
+    significance_markers(ax, [(1, 3, 170, '***'), (10, 20, 175, '**')])
+    ax.set_xlabel('Group')
+    ax.set_ylabel('Cell count')
+
+    start = time.perf_counter()
+    fig.canvas.draw()
+    print(f"Drew {len(data)} groups with {len(ax.get_children())} artists "
+          f"in {time.perf_counter() - start:.2f} s")
+    plt.show()
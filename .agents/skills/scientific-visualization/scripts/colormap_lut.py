@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Lookup-Table Colormapping for Large Scientific Image Panels
+
+This module maps large arrays to RGBA through precomputed uint8 lookup
+tables instead of matplotlib's generic normalize + colormap path, which
+runs again on every draw and for every export format. Colored panels can
+also be cached on disk so repeated exports skip colormapping entirely.
+"""
+
+import hashlib
+import importlib.util
+import os
+import sys
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize, to_rgba_array
+from matplotlib.image import AxesImage
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from style_presets import (OKABE_ITO_COLORS, TOL_BRIGHT, TOL_HIGH_CONTRAST,
+                           TOL_MUTED, WONG_COLORS)
+
+
+# Number of entries in a continuous colormap lookup table
+LUT_SIZE = 256
+
+
+def _load_color_palettes():
+    """Import assets/color_palettes.py, which is not on the scripts' path."""
+    if 'color_palettes' in sys.modules:
+        return sys.modules['color_palettes']
+    path = Path(__file__).resolve().parent.parent / 'assets' / 'color_palettes.py'
+    spec = importlib.util.spec_from_file_location('color_palettes', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules['color_palettes'] = module
+    return module
+
+
+# Colormaps recommended in assets/color_palettes.py
+SEQUENTIAL_COLORMAPS = list(_load_color_palettes().SEQUENTIAL_COLORMAPS)
+DIVERGING_COLORMAPS_SAFE = list(_load_color_palettes().DIVERGING_COLORMAPS_SAFE)
+
+# Discrete palettes, indexed by integer category labels
+DISCRETE_PALETTES = {
+    'okabe_ito': OKABE_ITO_COLORS,
+    'wong': WONG_COLORS,
+    'tol_bright': TOL_BRIGHT,
+    'tol_muted': TOL_MUTED,
+    'tol_high_contrast': TOL_HIGH_CONTRAST,
+}
+
+# Elements processed per vectorized step; bounds the temporary index buffer
+CHUNK_ELEMENTS = 4 * 1024 * 1024
+
+_LUT_CACHE: Dict[Tuple[str, int], np.ndarray] = {}
+
+
+def _finite_range(data: np.ndarray) -> Optional[Tuple[float, float]]:
+    """Minimum and maximum of the finite values in ``data``, or None if there are none."""
+    if data.size == 0:
+        return None
+    data_min, data_max = float(np.min(data)), float(np.max(data))
+    if not (np.isfinite(data_min) and np.isfinite(data_max)):
+        finite = data[np.isfinite(data)]
+        if finite.size == 0:
+            return None
+        data_min, data_max = float(finite.min()), float(finite.max())
+    return data_min, data_max
+
+
+def get_colormap_lut(name: str, n: int = LUT_SIZE) -> np.ndarray:
+    """
+    Get the uint8 RGBA lookup table of a colormap or discrete palette.
+
+    Tables are computed once per process and reused.
+
+    Parameters
+    ----------
+    name : str
+        Matplotlib colormap name (including '_r' variants) or one of the
+        discrete palettes: 'okabe_ito', 'wong', 'tol_bright', 'tol_muted',
+        'tol_high_contrast'
+    n : int, default LUT_SIZE
+        Number of entries for continuous colormaps (ignored for palettes)
+
+    Returns
+    -------
+    numpy.ndarray
+        Read-only array of shape (n, 4) and dtype uint8
+
+    Examples
+    --------
+    >>> lut = get_colormap_lut('RdBu_r')
+    >>> lut.shape
+    (256, 4)
+    """
+    if name in DISCRETE_PALETTES:
+        n = len(DISCRETE_PALETTES[name])
+
+    key = (name, n)
+    if key not in _LUT_CACHE:
+        if name in DISCRETE_PALETTES:
+            rgba = to_rgba_array(DISCRETE_PALETTES[name])
+            lut = np.round(rgba * 255).astype(np.uint8)
+        else:
+            cmap = mpl.colormaps[name].resampled(n)
+            lut = cmap(np.arange(n), bytes=True)
+        lut.flags.writeable = False
+        _LUT_CACHE[key] = lut
+
+    return _LUT_CACHE[key]
+
+
+def precompute_luts(names: Optional[Sequence[str]] = None, n: int = LUT_SIZE) -> List[str]:
+    """
+    Build the lookup tables of all recommended colormaps and palettes.
+
+    Useful in worker initializers so the first panel does not pay for it.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        Colormaps to prepare (default: the recommended sequential and
+        diverging colormaps, their '_r' variants and all discrete palettes)
+    n : int, default LUT_SIZE
+        Number of entries for continuous colormaps
+
+    Returns
+    -------
+    list of str
+        Names of the prepared tables
+    """
+    if names is None:
+        continuous = SEQUENTIAL_COLORMAPS + DIVERGING_COLORMAPS_SAFE
+        names = continuous + [f"{name}_r" for name in continuous] + list(DISCRETE_PALETTES)
+
+    for name in names:
+        get_colormap_lut(name, n)
+    return list(names)
+
+
+def apply_colormap(
+    data: np.ndarray,
+    cmap: str = 'viridis',
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+    out: Optional[np.ndarray] = None,
+    bad_color: Tuple[int, int, int, int] = (0, 0, 0, 0),
+    n: int = LUT_SIZE
+) -> np.ndarray:
+    """
+    Map a 2D array to uint8 RGBA with a precomputed lookup table.
+
+    Values are scaled to table indices and gathered in vectorized steps of
+    CHUNK_ELEMENTS, so temporary memory stays bounded for very large panels.
+    Scaling runs in the float type matplotlib's Normalize uses for the data
+    (float32 for float32 and small integer arrays), so the result matches
+    its normalize + colormap path. Out-of-range values take the end colors,
+    as with matplotlib's defaults. Data without finite values, such as an
+    all-NaN panel, maps entirely to ``bad_color`` unless vmin and vmax are
+    given.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        2D array of scalar values
+    cmap : str, default 'viridis'
+        Colormap name (see get_colormap_lut)
+    vmin, vmax : float, optional
+        Data range mapped onto the colormap (default: finite data range)
+    out : numpy.ndarray, optional
+        Preallocated uint8 array of shape data.shape + (4,), for example a
+        memory-mapped file, written in place
+    bad_color : tuple of int, default (0, 0, 0, 0)
+        RGBA color for NaN values
+    n : int, default LUT_SIZE
+        Number of colormap entries
+
+    Returns
+    -------
+    numpy.ndarray
+        RGBA image of shape data.shape + (4,) and dtype uint8
+
+    Examples
+    --------
+    >>> rgba = apply_colormap(matrix, cmap='RdBu_r', vmin=-1, vmax=1)
+    >>> ax.imshow(rgba)
+    """
+    data = np.asarray(data)
+    if data.ndim != 2:
+        raise ValueError(f"Expected a 2D array, got shape {data.shape}")
+
+    lut = get_colormap_lut(cmap, n)
+    n = len(lut)
+
+    if out is None:
+        out = np.empty(data.shape + (4,), dtype=np.uint8)
+    elif out.shape != data.shape + (4,) or out.dtype != np.uint8:
+        raise ValueError(f"'out' must be a uint8 array of shape {data.shape + (4,)}")
+
+    if vmin is None or vmax is None:
+        finite_range = _finite_range(data)
+        if finite_range is None:
+            out[...] = bad_color
+            return out
+        vmin = finite_range[0] if vmin is None else vmin
+        vmax = finite_range[1] if vmax is None else vmax
+    # Same operand types as Normalize: float64 limits, data-dependent buffer
+    vmin, vmax = np.float64(vmin), np.float64(vmax)
+    span = vmax - vmin if vmax > vmin else np.float64(np.inf)
+    dtype = data.dtype if data.dtype.kind == 'f' else np.promote_types(data.dtype, np.float32)
+
+    rows_per_chunk = max(1, CHUNK_ELEMENTS // max(data.shape[1], 1))
+    index = np.empty((rows_per_chunk, data.shape[1]), dtype=dtype)
+
+    for start in range(0, data.shape[0], rows_per_chunk):
+        chunk = data[start:start + rows_per_chunk]
+        idx = index[:len(chunk)]
+
+        np.subtract(chunk, vmin, out=idx, casting='unsafe')
+        idx /= span
+        idx *= n
+        bad = np.isnan(idx)
+        idx[bad] = 0
+        np.clip(idx, 0, n - 1, out=idx)
+
+        np.take(lut, idx.astype(np.intp), axis=0, out=out[start:start + len(chunk)])
+        if bad.any():
+            out[start:start + len(chunk)][bad] = bad_color
+
+    return out
+
+
+def apply_palette_lut(labels: np.ndarray, palette: str = 'okabe_ito') -> np.ndarray:
+    """
+    Map integer category labels to uint8 RGBA with a discrete palette.
+
+    Labels beyond the palette length wrap around, like the color cycle.
+
+    Parameters
+    ----------
+    labels : numpy.ndarray
+        Integer array of category labels
+    palette : str, default 'okabe_ito'
+        Discrete palette name
+
+    Returns
+    -------
+    numpy.ndarray
+        RGBA image of shape labels.shape + (4,) and dtype uint8
+    """
+    if palette not in DISCRETE_PALETTES:
+        available = ', '.join(DISCRETE_PALETTES.keys())
+        raise ValueError(f"Palette '{palette}' not found. Available: {available}")
+
+    return np.take(get_colormap_lut(palette), labels, axis=0, mode='wrap')
+
+
+def cached_colormap(
+    data: np.ndarray,
+    cmap: str = 'viridis',
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+    cache_dir: Union[str, Path] = '.colormap_cache',
+    key: Optional[str] = None,
+    n: int = LUT_SIZE
+) -> np.ndarray:
+    """
+    Colormap an array once and reuse the RGBA result across exports.
+
+    The colored panel is stored as a .npy file and returned memory-mapped,
+    so later exports of the same panel skip colormapping and only page in
+    what they read.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        2D array of scalar values
+    cmap : str, default 'viridis'
+        Colormap name
+    vmin, vmax : float, optional
+        Data range (default: finite data range)
+    cache_dir : str or Path, default '.colormap_cache'
+        Directory holding cached RGBA panels
+    key : str, optional
+        Stable identifier of ``data``. If omitted, the array contents are
+        hashed, which costs one read of the data.
+    n : int, default LUT_SIZE
+        Number of colormap entries
+
+    Returns
+    -------
+    numpy.ndarray
+        Read-only, memory-mapped RGBA image of dtype uint8
+
+    Examples
+    --------
+    >>> rgba = cached_colormap(matrix, cmap='viridis', key='fig2_panel_b')
+    >>> ax.imshow(rgba)
+    """
+    data = np.asarray(data)
+    if key is None:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str((data.shape, data.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(data).data)
+        key = digest.hexdigest()
+
+    spec = f"{key}|{cmap}|{vmin}|{vmax}|{n}"
+    name = hashlib.blake2b(spec.encode(), digest_size=16).hexdigest()
+
+    cache_dir = Path(cache_dir)
+    cache_file = cache_dir / f"{name}.npy"
+
+    if not cache_file.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_dir / f".{name}.{os.getpid()}.npy"
+        out = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.uint8,
+                                        shape=data.shape + (4,))
+        apply_colormap(data, cmap, vmin, vmax, out=out, n=n)
+        out.flush()
+        del out
+        os.replace(tmp_file, cache_file)
+
+    return np.load(cache_file, mmap_mode='r')
+
+
+def imshow_lut(
+    ax: plt.Axes,
+    data: np.ndarray,
+    cmap: str = 'viridis',
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+    key: Optional[str] = None,
+    **kwargs
+) -> Tuple[AxesImage, ScalarMappable]:
+    """
+    Show a large array with lookup-table colormapping.
+
+    Drop-in replacement for ``ax.imshow(data, cmap=...)``: the image is
+    colored once up front, so draws and exports only resample RGBA pixels.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw into
+    data : numpy.ndarray
+        2D array of scalar values
+    cmap : str, default 'viridis'
+        Colormap name
+    vmin, vmax : float, optional
+        Data range (default: finite data range)
+    cache_dir : str or Path, optional
+        If given, reuse colored panels through cached_colormap()
+    key : str, optional
+        Stable identifier of ``data`` for the cache
+    **kwargs
+        Additional keyword arguments passed to ax.imshow()
+
+    Returns
+    -------
+    tuple
+        ``(image, mappable)``; pass ``mappable`` to fig.colorbar()
+
+    Examples
+    --------
+    >>> im, mappable = imshow_lut(ax, matrix, cmap='RdBu_r', vmin=-1, vmax=1)
+    >>> fig.colorbar(mappable, ax=ax, label='Correlation')
+    """
+    data = np.asarray(data)
+    if vmin is None or vmax is None:
+        # Without finite values every pixel is bad; any range serves the colorbar
+        data_min, data_max = _finite_range(data) or (0.0, 1.0)
+        vmin = data_min if vmin is None else vmin
+        vmax = data_max if vmax is None else vmax
+
+    if cache_dir is not None:
+        rgba = cached_colormap(data, cmap, vmin, vmax, cache_dir=cache_dir, key=key)
+    else:
+        rgba = apply_colormap(data, cmap, vmin, vmax)
+
+    image = ax.imshow(rgba, **kwargs)
+    mappable = ScalarMappable(norm=Normalize(vmin=vmin, vmax=vmax), cmap=cmap)
+    return image, mappable
+
+
+if __name__ == "__main__":
+    # Example usage
+    import time
+
+    precompute_luts()
+    print(f"Prepared {len(_LUT_CACHE)} lookup tables")
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((4000, 4000))
+
+    start = time.perf_counter()
+    mpl.colormaps['RdBu_r'](Normalize(-3, 3)(matrix), bytes=True)
+    print(f"matplotlib colormap: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    apply_colormap(matrix, 'RdBu_r', vmin=-3, vmax=3)
+    print(f"Lookup table:        {time.perf_counter() - start:.2f} s")
+
+    fig, ax = plt.subplots(figsize=(3.5, 3))
+    im, mappable = imshow_lut(ax, matrix, cmap='RdBu_r', vmin=-3, vmax=3)
+    fig.colorbar(mappable, ax=ax, label='Value')
+    plt.show()
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Distributed Figure Export over a Shared-Directory Job Queue
+
+This module spreads figure exports over several hosts that share a
+filesystem. Jobs are JSON files in a queue directory; workers claim them
+with atomic renames, so no lock server is needed. Claimed jobs carry the
+claim time in their name and a heartbeat (their modification time), and
+jobs whose worker stopped beating are put back in the queue and retried.
+
+Queue layout::
+
+    queue/pending/<job>.<attempt>.json                waiting to be claimed
+    queue/claimed/<job>.<attempt>.<worker>.<ms>.json  being rendered since <ms>
+    queue/done/<job>.json                             finished
+    queue/failed/<job>.json                           out of attempts
+    queue/results/<job>.json                          outputs or last error
+    queue/data/                                       arrays of unfinished jobs
+
+Run workers with ``python distributed_export.py worker QUEUE_DIR`` on each host.
+"""
+
+import importlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+import uuid
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from batch_export import _init_worker, _run_export_job, memmap_array
+
+
+QUEUE_DIRS = ('pending', 'claimed', 'done', 'failed', 'results', 'data', 'tmp')
+
+
+def _queue_paths(queue_dir: Union[str, Path]) -> Dict[str, Path]:
+    """Return (and create) the subdirectories of a queue."""
+    queue_dir = Path(queue_dir)
+    paths = {name: queue_dir / name for name in QUEUE_DIRS}
+    for path in paths.values():
+        path.mkdir(parents=True, exist_ok=True)
+    return paths
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any], tmp_dir: Path) -> None:
+    """Write JSON so that readers never see a partial file."""
+    tmp_file = tmp_dir / f"{uuid.uuid4().hex}.json"
+    tmp_file.write_text(json.dumps(data, indent=2), encoding='utf-8')
+    os.replace(tmp_file, path)
+
+
+def _parse_name(path: Path) -> List[str]:
+    """Split a queue file name into job id, attempt and (if claimed) worker and claim time."""
+    return path.name[:-len('.json')].split('.')
+
+
+def submit_job(
+    queue_dir: Union[str, Path],
+    plot_func: Union[Callable, str],
+    filename: Union[str, Path],
+    data: Optional[Dict[str, Any]] = None,
+    journal: Optional[str] = None,
+    figure_type: str = 'combination',
+    **save_kwargs
+) -> str:
+    """
+    Add a figure export job to a queue.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory on the shared filesystem
+    plot_func : callable or str
+        Module-level function that builds and returns a Figure, or its
+        import path as ``'module:function'``. Workers must be able to import it.
+    filename : str or Path
+        Base output filename (without extension), on the shared filesystem
+    data : dict, optional
+        Keyword arguments for ``plot_func``. NumPy arrays are stored in the
+        queue's data directory and memory-mapped by the worker; other values
+        must be JSON-serializable.
+    journal : str, optional
+        Export with save_for_journal() for this journal
+    figure_type : str, default 'combination'
+        Figure type for save_for_journal()
+    **save_kwargs
+        ``deterministic`` for save_for_journal(), or save_publication_figure()
+        arguments when no journal is given
+
+    Returns
+    -------
+    str
+        Job id
+
+    Examples
+    --------
+    >>> job_id = submit_job('/shared/queue', 'figures.growth:plot_growth',
+    ...                     '/shared/build/figure1', data={'curves': curves},
+    ...                     journal='nature', figure_type='line_art')
+    """
+    paths = _queue_paths(queue_dir)
+    job_id = uuid.uuid4().hex
+
+    if callable(plot_func):
+        plot_func = f"{plot_func.__module__}:{plot_func.__qualname__}"
+
+    job_data = {}
+    for key, value in (data or {}).items():
+        if isinstance(value, np.ndarray):
+            array_file = paths['data'] / f"{job_id}_{key}.npy"
+            np.save(array_file, value)
+            value = {'npy': str(array_file.resolve())}
+        job_data[key] = value
+
+    job = {'id': job_id, 'plot_func': plot_func, 'filename': str(filename), 'data': job_data}
+    if journal is not None:
+        job['journal'] = journal
+        job['figure_type'] = figure_type
+        job['deterministic'] = save_kwargs.pop('deterministic', False)
+    job['save_kwargs'] = save_kwargs
+
+    _write_json_atomic(paths['pending'] / f"{job_id}.0.json", job, paths['tmp'])
+    return job_id
+
+
+def _load_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a queued JSON job into a batch_export job."""
+    module_name, func_name = job['plot_func'].split(':')
+    plot_func = importlib.import_module(module_name)
+    for part in func_name.split('.'):
+        plot_func = getattr(plot_func, part)
+
+    data = {}
+    for key, value in job['data'].items():
+        if isinstance(value, dict) and set(value) == {'npy'}:
+            value = memmap_array(value['npy'])
+        data[key] = value
+
+    return dict(job, plot_func=plot_func, data=data)
+
+
+def _remove_job_data(job_file: Path) -> None:
+    """Delete the arrays a finished or failed job was submitted with."""
+    try:
+        job = json.loads(job_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return
+    for value in job.get('data', {}).values():
+        if isinstance(value, dict) and set(value) == {'npy'}:
+            Path(value['npy']).unlink(missing_ok=True)
+
+
+def claim_job(queue_dir: Union[str, Path], worker_id: str) -> Optional[Path]:
+    """
+    Claim the oldest pending job.
+
+    The rename from pending/ to claimed/ is atomic, so exactly one worker
+    wins each job. The claim time is part of the new name, because the
+    renamed file keeps the modification time it had while pending.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory
+    worker_id : str
+        Identifier of the claiming worker (no dots)
+
+    Returns
+    -------
+    Path or None
+        Path of the claimed job file, or None if the queue is empty
+    """
+    paths = _queue_paths(queue_dir)
+    candidates = []
+    for candidate in paths['pending'].glob('*.json'):
+        try:
+            candidates.append((candidate.stat().st_mtime, candidate))
+        except FileNotFoundError:
+            continue  # Claimed while listing
+
+    for _, candidate in sorted(candidates):
+        job_id, attempt = _parse_name(candidate)[:2]
+        claimed_ms = int(time.time() * 1000)
+        claimed = paths['claimed'] / f"{job_id}.{attempt}.{worker_id}.{claimed_ms}.json"
+        try:
+            os.rename(candidate, claimed)
+        except FileNotFoundError:
+            continue  # Another worker was faster
+        os.utime(claimed)
+        return claimed
+
+    return None
+
+
+def requeue_abandoned(
+    queue_dir: Union[str, Path],
+    timeout: float = 60.0,
+    max_attempts: int = 3
+) -> List[str]:
+    """
+    Return jobs whose worker stopped sending heartbeats to the queue.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory
+    timeout : float, default 60.0
+        Seconds without a heartbeat after which a claim is abandoned
+    max_attempts : int, default 3
+        Jobs that were claimed this many times move to failed/
+
+    Returns
+    -------
+    list of str
+        Ids of the requeued or failed jobs
+    """
+    paths = _queue_paths(queue_dir)
+    now = time.time()
+    recovered = []
+
+    for claimed in paths['claimed'].glob('*.json'):
+        job_id, attempt, worker_id, claimed_ms = _parse_name(claimed)
+        try:
+            last_beat = max(claimed.stat().st_mtime, int(claimed_ms) / 1000)
+        except FileNotFoundError:
+            continue
+        if now - last_beat < timeout:
+            continue
+
+        attempt = int(attempt) + 1
+        if attempt >= max_attempts:
+            target = paths['failed'] / f"{job_id}.json"
+        else:
+            target = paths['pending'] / f"{job_id}.{attempt}.json"
+
+        try:
+            os.rename(claimed, target)
+        except FileNotFoundError:
+            continue  # Finished or recovered by someone else meanwhile
+        if attempt >= max_attempts:
+            _remove_job_data(target)
+            result = {'id': job_id, 'worker': worker_id, 'attempt': attempt - 1,
+                      'status': 'error',
+                      'error': f"Worker {worker_id} stopped sending heartbeats",
+                      'seconds': round(now - int(claimed_ms) / 1000, 3)}
+            _write_json_atomic(paths['results'] / f"{job_id}.json", result, paths['tmp'])
+        print(f"✗ Worker {worker_id} abandoned job {job_id}; "
+              f"{'failed' if attempt >= max_attempts else 'requeued'}")
+        recovered.append(job_id)
+
+    return recovered
+
+
+def _heartbeat(claimed: Path, interval: float, stop: threading.Event) -> None:
+    """Touch a claimed job file until ``stop`` is set."""
+    while not stop.wait(interval):
+        try:
+            os.utime(claimed)
+        except FileNotFoundError:
+            return  # The claim was taken away from us
+
+
+def run_worker(
+    queue_dir: Union[str, Path],
+    worker_id: Optional[str] = None,
+    poll_interval: float = 1.0,
+    heartbeat_interval: float = 10.0,
+    abandon_timeout: float = 60.0,
+    max_attempts: int = 3,
+    exit_when_idle: bool = False
+) -> int:
+    """
+    Claim and render jobs from a queue until stopped.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory on the shared filesystem
+    worker_id : str, optional
+        Worker identifier (default: ``<hostname>-<pid>``)
+    poll_interval : float, default 1.0
+        Seconds to wait when the queue is empty
+    heartbeat_interval : float, default 10.0
+        Seconds between heartbeats while rendering
+    abandon_timeout : float, default 60.0
+        Seconds without a heartbeat after which other workers requeue a job
+    max_attempts : int, default 3
+        Attempts per job before it moves to failed/
+    exit_when_idle : bool, default False
+        Return once no job is pending or claimed
+
+    Returns
+    -------
+    int
+        Number of jobs completed by this worker
+    """
+    paths = _queue_paths(queue_dir)
+    if worker_id is None:
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    worker_id = worker_id.replace('.', '-')
+
+    _init_worker()
+    completed = 0
+    print(f"Worker {worker_id} polling {queue_dir}")
+
+    while True:
+        requeue_abandoned(queue_dir, abandon_timeout, max_attempts)
+
+        claimed = claim_job(queue_dir, worker_id)
+        if claimed is None:
+            if exit_when_idle and not any(paths['pending'].iterdir()) \
+                    and not any(paths['claimed'].iterdir()):
+                return completed
+            time.sleep(poll_interval)
+            continue
+
+        job_id, attempt = _parse_name(claimed)[:2]
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(claimed, heartbeat_interval, stop),
+                                daemon=True)
+        beat.start()
+
+        start = time.time()
+        result = {'id': job_id, 'worker': worker_id, 'attempt': int(attempt)}
+        try:
+            job = json.loads(claimed.read_text(encoding='utf-8'))
+            outputs = _run_export_job(_load_job(job))
+            if not outputs:
+                raise RuntimeError("No output file was written")
+            result.update(status='done', outputs=outputs)
+        except Exception as e:
+            result.update(status='error', error=f"{type(e).__name__}: {e}",
+                          traceback=traceback.format_exc())
+        finally:
+            stop.set()
+            beat.join()
+
+        result['seconds'] = round(time.time() - start, 3)
+
+        if result['status'] == 'done':
+            target = paths['done'] / f"{job_id}.json"
+        elif int(attempt) + 1 >= max_attempts:
+            target = paths['failed'] / f"{job_id}.json"
+        else:
+            target = paths['pending'] / f"{job_id}.{int(attempt) + 1}.json"
+
+        try:
+            os.rename(claimed, target)
+        except FileNotFoundError:
+            # Requeued by another worker after a missed heartbeat; the job
+            # and its result belong to whoever holds the claim now
+            print(f"✗ {worker_id}: lost the claim on job {job_id}; result discarded")
+            continue
+
+        _write_json_atomic(paths['results'] / f"{job_id}.json", result, paths['tmp'])
+        if target.parent != paths['pending']:
+            _remove_job_data(target)
+        if result['status'] == 'done':
+            completed += 1
+
+        mark = '✓' if result['status'] == 'done' else '✗'
+        print(f"{mark} {worker_id}: job {job_id} {result['status']} in {result['seconds']} s")
+
+
+def collect_results(queue_dir: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the results of all finished and failed jobs.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory
+
+    Returns
+    -------
+    dict
+        Mapping of job id to result, with 'status' ('done' or 'error'),
+        'outputs' or 'error', 'worker', 'attempt' and 'seconds'
+    """
+    paths = _queue_paths(queue_dir)
+    results = {}
+    for result_file in paths['results'].glob('*.json'):
+        results[result_file.stem] = json.loads(result_file.read_text(encoding='utf-8'))
+    return results
+
+
+def purge_finished(queue_dir: Union[str, Path]) -> int:
+    """
+    Delete the arrays of finished and failed jobs from the queue's data directory.
+
+    Workers delete them as jobs finish; this removes what is left behind by
+    workers that stopped in between.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory
+
+    Returns
+    -------
+    int
+        Number of array files deleted
+    """
+    paths = _queue_paths(queue_dir)
+    before = sum(1 for _ in paths['data'].glob('*.npy'))
+    for state in ('done', 'failed'):
+        for job_file in paths[state].glob('*.json'):
+            _remove_job_data(job_file)
+    removed = before - sum(1 for _ in paths['data'].glob('*.npy'))
+
+    print(f"✓ Purged {removed} array file(s) from {paths['data']}")
+    return removed
+
+
+def queue_status(queue_dir: Union[str, Path]) -> Dict[str, int]:
+    """
+    Count the jobs in each state of a queue.
+
+    Parameters
+    ----------
+    queue_dir : str or Path
+        Queue directory
+
+    Returns
+    -------
+    dict
+        Number of 'pending', 'claimed', 'done' and 'failed' jobs
+    """
+    paths = _queue_paths(queue_dir)
+    status = {state: sum(1 for _ in paths[state].glob('*.json'))
+              for state in ('pending', 'claimed', 'done', 'failed')}
+
+    print(f"Queue {queue_dir}: " + ', '.join(f"{count} {state}" for state, count in status.items()))
+    return status
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distributed figure export worker")
+    parser.add_argument('command', choices=['worker', 'status', 'purge'])
+    parser.add_argument('queue_dir', help="Queue directory on the shared filesystem")
+    parser.add_argument('--worker-id', help="Worker identifier (default: <hostname>-<pid>)")
+    parser.add_argument('--path', action='append', default=[],
+                        help="Directory to add to sys.path for importing plot functions")
+    parser.add_argument('--exit-when-idle', action='store_true',
+                        help="Stop once no job is pending or claimed")
+    parser.add_argument('--abandon-timeout', type=float, default=60.0,
+                        help="Seconds without heartbeat before a job is requeued")
+    args = parser.parse_args()
+
+    sys.path[:0] = args.path
+
+    if args.command == 'worker':
+        count = run_worker(args.queue_dir, worker_id=args.worker_id,
+                           abandon_timeout=args.abandon_timeout,
+                           exit_when_idle=args.exit_when_idle)
+        print(f"Worker finished {count} job(s)")
+    elif args.command == 'purge':
+        purge_finished(args.queue_dir)
+    else:
+        queue_status(args.queue_dir)
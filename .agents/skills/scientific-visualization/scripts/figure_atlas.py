@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Figure Atlas Export for Figure-Heavy Manuscripts
+
+This module writes all figures of a manuscript into one multi-page PDF.
+Fonts embedded once serve every page, and LaTeX opens a single file:
+
+    \\input{figures/figures-atlas.tex}
+    \\includeatlas[width=\\linewidth]{figures-atlas}{growth_curves}
+
+\\includeatlas takes the atlas name (its file name without extension) and
+the figure name, so a document can load several atlases whose figure names
+overlap. An index maps figure names to pages. Pages never move once
+assigned, new figures are appended, and an atlas whose figures are
+unchanged is not touched at all.
+"""
+
+import hashlib
+import io
+import json
+import os
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from figure_export import DETERMINISTIC_METADATA, _source_date, render_publication_figure
+
+
+# Settings shared by every atlas page, matching save_publication_figure()
+ATLAS_SAVE_KWARGS = {
+    'dpi': 300,
+    'bbox_inches': 'tight',
+    'pad_inches': 0.1,
+    'facecolor': 'white',
+    'edgecolor': 'none',
+}
+
+
+def _figure_fingerprint(fig: plt.Figure) -> str:
+    """Hash of the figure's deterministic single-page PDF rendering."""
+    pdf = render_publication_figure(fig, formats=['pdf'], deterministic=True)['pdf']
+    return hashlib.sha256(pdf).hexdigest()
+
+
+def _read_index(atlas_path: Path) -> Dict[str, Any]:
+    """Full JSON index of an atlas, or an empty dict if there is none."""
+    index_file = atlas_path.with_suffix('.json')
+    if not index_file.exists():
+        return {}
+    return json.loads(index_file.read_text(encoding='utf-8'))
+
+
+def _replace_text(path: Path, text: str) -> None:
+    """Write a text file through a temporary file and an atomic rename."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def load_atlas_index(atlas_path: Union[str, Path]) -> List[Dict[str, Union[str, int]]]:
+    """
+    Read the page index of an atlas.
+
+    Parameters
+    ----------
+    atlas_path : str or Path
+        Path of the atlas PDF
+
+    Returns
+    -------
+    list of dict
+        One entry per page, in page order, with 'name', 'page' (1-based)
+        and 'fingerprint'. Empty if the atlas does not exist yet.
+    """
+    return _read_index(Path(atlas_path)).get('pages', [])
+
+
+def _write_index(
+    atlas_path: Path,
+    pages: List[Dict[str, Union[str, int]]],
+    sha256: str,
+    manuscript_dir: Union[str, Path]
+) -> None:
+    """Write the JSON index and the LaTeX page macros next to the atlas.
+
+    The macros are namespaced by the atlas name, so that \\includeatlas
+    (shared by all atlases) finds the right file and page in documents that
+    load several atlases.
+    """
+    index = {'atlas': atlas_path.name, 'sha256': sha256, 'pages': pages}
+    _replace_text(atlas_path.with_suffix('.json'), json.dumps(index, indent=2) + '\n')
+
+    # \includegraphics resolves paths against the directory LaTeX runs in
+    graphic = Path(os.path.relpath(atlas_path, manuscript_dir)).as_posix()
+
+    atlas = atlas_path.stem
+
+    lines = [
+        f"% Page index of {atlas_path.name}, generated by figure_atlas.py",
+        f"% Usage: \\includeatlas[width=\\linewidth]{{{atlas}}}{{{pages[0]['name']}}}",
+        f"\\expandafter\\def\\csname atlasfile@{atlas}\\endcsname{{{graphic}}}",
+    ]
+    for entry in pages:
+        lines.append(f"\\expandafter\\def\\csname atlaspage@{atlas}@{entry['name']}\\endcsname"
+                     f"{{{entry['page']}}}")
+    lines.append(
+        "\\providecommand{\\includeatlas}[3][]{%\n"
+        "  \\includegraphics[#1,page=\\csname atlaspage@#2@#3\\endcsname]"
+        "{\\csname atlasfile@#2\\endcsname}}"
+    )
+    _replace_text(atlas_path.with_suffix('.tex'), '\n'.join(lines) + '\n')
+
+
+def save_figure_atlas(
+    figures: Dict[str, plt.Figure],
+    atlas_path: Union[str, Path] = 'figures-atlas.pdf',
+    manuscript_dir: Union[str, Path] = '.'
+) -> Dict[str, int]:
+    """
+    Write figures into a multi-page PDF atlas with a page index.
+
+    Figures keep the page they were first given. Figures not yet in the
+    atlas are appended; when pypdf is installed they are added as a PDF
+    incremental update, so the bytes of existing pages are left as they
+    are and other figures need not be passed. Changed figures require a
+    full rewrite, for which every figure of the atlas must be passed. If
+    nothing changed, no file is written. An atlas that does not match its
+    index (e.g. after an interrupted write) is rewritten in full.
+
+    Parameters
+    ----------
+    figures : dict
+        Mapping of figure name (used in LaTeX) to Figure
+    atlas_path : str or Path, default 'figures-atlas.pdf'
+        Atlas PDF; the index is written next to it as .json and .tex
+    manuscript_dir : str or Path, default '.'
+        Directory LaTeX compiles the manuscript in; the .tex index refers
+        to the atlas relative to it
+
+    Returns
+    -------
+    dict
+        Mapping of every figure name in the atlas to its 1-based page
+
+    Examples
+    --------
+    >>> pages = save_figure_atlas({'growth_curves': fig1, 'heatmap': fig2},
+    ...                           'figures/figures-atlas.pdf')
+    >>> pages
+    {'growth_curves': 1, 'heatmap': 2}
+    """
+    atlas_path = Path(atlas_path)
+    atlas_path.parent.mkdir(parents=True, exist_ok=True)
+
+    index = _read_index(atlas_path)
+    pages = index.get('pages', [])
+    known = {entry['name']: entry for entry in pages}
+    fingerprints = {name: _figure_fingerprint(fig) for name, fig in figures.items()}
+
+    stale = bool(pages) and (not atlas_path.exists() or
+                             hashlib.sha256(atlas_path.read_bytes()).hexdigest() != index.get('sha256'))
+    if stale:
+        print(f"Warning: {atlas_path} does not match its index; rewriting all pages")
+
+    changed = [name for name in figures
+               if name in known and (stale or known[name]['fingerprint'] != fingerprints[name])]
+    added = [name for name in figures if name not in known]
+
+    if not changed and not added:
+        print(f"= Unchanged: {atlas_path} ({len(pages)} pages)")
+        return {entry['name']: entry['page'] for entry in pages}
+
+    for name in added:
+        pages.append({'name': name, 'page': len(pages) + 1, 'fingerprint': fingerprints[name]})
+    for name in changed:
+        known[name]['fingerprint'] = fingerprints[name]
+
+    missing = [entry['name'] for entry in pages if entry['name'] not in figures]
+    incremental = not changed and not stale and bool(pages) and len(added) < len(pages)
+
+    if incremental:
+        try:
+            from pypdf import PdfWriter
+        except ImportError:
+            incremental = False
+            if missing:
+                raise ValueError(
+                    f"Appending without the other figures requires pypdf (pip install pypdf); "
+                    f"otherwise pass all figures. Missing: {', '.join(missing)}")
+
+    if not incremental and missing:
+        raise ValueError(f"Changed figures require a full rewrite; pass all figures. "
+                         f"Missing: {', '.join(missing)}")
+
+    tmp_path = atlas_path.with_name(f".{atlas_path.name}.{os.getpid()}.tmp")
+    ordered = added if incremental else [entry['name'] for entry in pages]
+
+    buffer = io.BytesIO()
+    metadata = dict(DETERMINISTIC_METADATA['pdf'], CreationDate=_source_date())
+    with PdfPages(buffer, metadata=metadata) as pdf:
+        for name in ordered:
+            pdf.savefig(figures[name], **ATLAS_SAVE_KWARGS)
+
+    if incremental:
+        writer = PdfWriter(atlas_path, incremental=True)
+        writer.append(io.BytesIO(buffer.getvalue()), import_outline=False)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        action = f"appended {len(added)} page(s)"
+    else:
+        action = f"wrote {len(pages)} page(s)"
+
+    # The index goes first and records the atlas hash, so an atlas left
+    # behind by an interrupted write is detected and rewritten next time
+    tmp_path.write_bytes(buffer.getvalue())
+    _write_index(atlas_path, pages, hashlib.sha256(buffer.getvalue()).hexdigest(), manuscript_dir)
+    os.replace(tmp_path, atlas_path)
+    print(f"✓ Saved atlas: {atlas_path} ({action})")
+
+    return {entry['name']: entry['page'] for entry in pages}
+
+
+if __name__ == "__main__":
+    # Example usage
+    import numpy as np
+
+    figures = {}
+    x = np.linspace(0, 10, 100)
+    for i, name in enumerate(['sine', 'cosine', 'damped']):
+        fig, ax = plt.subplots(figsize=(3.5, 2.5))
+        ax.plot(x, np.sin(x + i) * np.exp(-x * i / 10))
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Amplitude (mV)')
+        figures[name] = fig
+
+    print(save_figure_atlas(figures, 'example_atlas.pdf'))
+
+    # Re-exporting unchanged figures does not touch the atlas
+    print(save_figure_atlas(figures, 'example_atlas.pdf'))
+
+    for fig in figures.values():
+        plt.close(fig)
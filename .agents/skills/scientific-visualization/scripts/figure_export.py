@@ -6,33 +6,419 @@ This module provides utilities to export matplotlib figures in publication-ready
 formats with appropriate settings for various journals.
 """
 
+import io
+import os
+import re
+import tempfile
+import threading
+import uuid
 import matplotlib.pyplot as plt
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+
+# Metadata entries that embed the matplotlib version or export tool, per format.
+# Dates are pinned separately (see _source_date).
+DETERMINISTIC_METADATA = {
+    'pdf': {'Creator': None, 'Producer': None},
+    'svg': {'Creator': None},
+    'eps': {'Creator': 'Matplotlib'},
+    'ps': {'Creator': 'Matplotlib'},
+    'png': {'Software': None},
+}
+
+# Metadata entry holding the creation date, per format. PostScript has none;
+# its DSC date comment is rewritten after rendering.
+DETERMINISTIC_DATE_KEYS = {'pdf': 'CreationDate', 'svg': 'Date'}
+
+# Fixed salt for the element ids matplotlib writes into SVG files.
+DETERMINISTIC_SVG_HASHSALT = 'publication-figure'
+_SVG_HASHSALT_LOCK = threading.Lock()
+
+# Vector formats; embedded rasters in them are capped at VECTOR_MAX_DPI
+VECTOR_FORMATS = ['pdf', 'eps', 'svg', 'pgf']
+VECTOR_MAX_DPI = 300
+
+# Journal export requirements per figure type (used by save_for_journal)
+JOURNAL_EXPORT_SPECS = {
+    'nature': {
+        'line_art': {'formats': ['pdf', 'eps'], 'dpi': 1000},
+        'photo': {'formats': ['tiff'], 'dpi': 300},
+        'combination': {'formats': ['pdf'], 'dpi': 600},
+    },
+    'science': {
+        'line_art': {'formats': ['eps', 'pdf'], 'dpi': 1000},
+        'photo': {'formats': ['tiff'], 'dpi': 300},
+        'combination': {'formats': ['eps'], 'dpi': 600},
+    },
+    'cell': {
+        'line_art': {'formats': ['pdf', 'eps'], 'dpi': 1000},
+        'photo': {'formats': ['tiff'], 'dpi': 300},
+        'combination': {'formats': ['pdf'], 'dpi': 600},
+    },
+    'plos': {
+        'line_art': {'formats': ['pdf', 'eps'], 'dpi': 600},
+        'photo': {'formats': ['tiff', 'png'], 'dpi': 300},
+        'combination': {'formats': ['tiff'], 'dpi': 300},
+    },
+    'acs': {
+        'line_art': {'formats': ['tiff', 'pdf'], 'dpi': 600},
+        'photo': {'formats': ['tiff'], 'dpi': 300},
+        'combination': {'formats': ['tiff'], 'dpi': 600},
+    },
+    'ieee': {
+        'line_art': {'formats': ['pdf', 'eps'], 'dpi': 600},
+        'photo': {'formats': ['tiff'], 'dpi': 300},
+        'combination': {'formats': ['pdf'], 'dpi': 300},
+    },
+}
+
+# Journal figure dimensions in mm (used by check_figure_size)
+JOURNAL_SIZE_SPECS = {
+    'nature': {'single': 89, 'double': 183, 'max_height': 247},
+    'science': {'single': 55, 'double': 175, 'max_height': 233},
+    'cell': {'single': 85, 'double': 178, 'max_height': 230},
+    'plos': {'single': 83, 'double': 173, 'max_height': 233},
+    'acs': {'single': 82.5, 'double': 178, 'max_height': 247},
+}
+
+
+def _source_date() -> datetime:
+    """Creation date of deterministic exports: SOURCE_DATE_EPOCH, or 0 if unset."""
+    return datetime.fromtimestamp(int(os.environ.get('SOURCE_DATE_EPOCH') or 0), timezone.utc)
+
+
+@contextmanager
+def _svg_hashsalt() -> Iterator[None]:
+    """
+    Fix the salt of SVG element ids during one render.
+
+    matplotlib reads the salt from rcParams while rendering and has no
+    savefig() argument for it, so only this key is set, under a lock, and
+    only if the user left it unset.
+    """
+    with _SVG_HASHSALT_LOCK:
+        if plt.rcParams['svg.hashsalt'] is not None:
+            yield
+            return
+        plt.rcParams['svg.hashsalt'] = DETERMINISTIC_SVG_HASHSALT
+        try:
+            yield
+        finally:
+            plt.rcParams['svg.hashsalt'] = None
+
+
+def _file_holds(path: Path, data: bytes) -> bool:
+    """Whether the file at ``path`` already holds exactly these bytes."""
+    try:
+        return path.stat().st_size == len(data) and path.read_bytes() == data
+    except FileNotFoundError:
+        return False
+
+
+class AtomicWriteBatch:
+    """
+    Atomic file writes with one batched fsync.
+
+    Each file is written to a temporary file next to its destination. On
+    commit() all temporary files are flushed to disk together, renamed over
+    their destinations and each directory is synced once. Readers such as a
+    concurrent LaTeX build see either the previous file or the complete new
+    one, never a partial write. Staging the same destination again replaces
+    the earlier version. Uncommitted files are removed, also when commit()
+    fails partway.
+
+    Parameters
+    ----------
+    fsync : bool, default True
+        Flush files and directories to disk on commit. Without it renames
+        are still atomic for readers, but not durable across power loss.
+
+    Examples
+    --------
+    >>> with AtomicWriteBatch() as writer:
+    ...     for name, fig in figures.items():
+    ...         save_publication_figure(fig, f'figures/{name}', writer=writer)
+    """
+
+    def __init__(self, fsync: bool = True):
+        self.fsync = fsync
+        self._pending: Dict[Path, Path] = {}  # destination -> temporary file
+
+    @contextmanager
+    def open(self, path: Union[str, Path]) -> Iterator[BinaryIO]:
+        """Open a temporary file that replaces ``path`` on commit()."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'xb') as f:
+                yield f
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        previous = self._pending.pop(path, None)
+        if previous is not None:
+            previous.unlink(missing_ok=True)
+        self._pending[path] = tmp_path
+
+    def write(self, path: Union[str, Path], data: bytes) -> None:
+        """Stage ``data`` to replace the file at ``path`` on commit()."""
+        with self.open(path) as f:
+            f.write(data)
+
+    def commit(self) -> List[Path]:
+        """
+        Move all staged files into place.
+
+        Returns
+        -------
+        list of Path
+            Destinations that were replaced
+        """
+        try:
+            if self.fsync:
+                for tmp_path in self._pending.values():
+                    fd = os.open(tmp_path, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+
+            replaced = []
+            while self._pending:
+                path, tmp_path = next(iter(self._pending.items()))
+                os.replace(tmp_path, path)
+                del self._pending[path]
+                replaced.append(path)
+                print(f"✓ Saved: {path}")
+        except BaseException:
+            self.discard()
+            raise
+
+        if self.fsync and hasattr(os, 'O_DIRECTORY'):
+            for directory in {path.parent for path in replaced}:
+                fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+        return replaced
+
+    def discard(self) -> None:
+        """Remove all staged files without touching their destinations."""
+        pending, self._pending = self._pending, {}
+        for tmp_path in pending.values():
+            tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> 'AtomicWriteBatch':
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def _savefig_kwargs(
+    fmt: str,
+    dpi: int,
+    transparent: bool,
+    bbox_inches: str,
+    pad_inches: float,
+    facecolor: str,
+    deterministic: bool,
+    kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """fig.savefig() arguments for one format."""
+    save_kwargs = {
+        'dpi': dpi,
+        'bbox_inches': bbox_inches,
+        'pad_inches': pad_inches,
+        'facecolor': facecolor if not transparent else 'none',
+        'edgecolor': 'none',
+        'transparent': transparent,
+        'format': fmt,
+    }
+
+    if deterministic and fmt in DETERMINISTIC_METADATA:
+        save_kwargs['metadata'] = dict(DETERMINISTIC_METADATA[fmt])
+        if fmt in DETERMINISTIC_DATE_KEYS:
+            save_kwargs['metadata'][DETERMINISTIC_DATE_KEYS[fmt]] = _source_date()
+
+    # Update with user-provided kwargs
+    save_kwargs.update(kwargs)
+
+    # Adjust DPI for vector formats (DPI less relevant)
+    if fmt in VECTOR_FORMATS:
+        save_kwargs['dpi'] = min(dpi, VECTOR_MAX_DPI)  # Lower DPI for embedded rasters in vector
+
+    return save_kwargs
+
+
+def _save_pgf(
+    fig: plt.Figure,
+    output_file: Path,
+    save_kwargs: Dict[str, Any],
+    deterministic: bool,
+    batch: AtomicWriteBatch
+) -> None:
+    """
+    Stage a PGF figure together with its raster side files.
+
+    The PGF backend writes images as ``<name>-img<N>.png`` next to the
+    target and cannot stream them, so the figure is saved into a temporary
+    directory under its final name and every file is then staged from there.
+    """
+    with tempfile.TemporaryDirectory(dir=output_file.parent, prefix='.pgf-') as tmp_dir:
+        fig.savefig(Path(tmp_dir) / output_file.name, **save_kwargs)
+
+        for rendered in sorted(Path(tmp_dir).iterdir()):
+            destination = output_file.parent / rendered.name
+            data = rendered.read_bytes()
+            if deterministic and _file_holds(destination, data):
+                print(f"= Unchanged: {destination}")
+            else:
+                batch.write(destination, data)
+
+
+def _savefig_stream(
+    fig: plt.Figure,
+    target: BinaryIO,
+    save_kwargs: Dict[str, Any],
+    deterministic: bool = False
+) -> None:
+    """
+    fig.savefig() into a file-like object, explaining PGF's raster limitation.
+
+    Deterministic renders get fixed SVG ids and a pinned PostScript date;
+    other formats take their date from the metadata set by _savefig_kwargs().
+    """
+    fmt = save_kwargs['format']
+    try:
+        if deterministic and fmt in ('eps', 'ps'):
+            buffer = io.BytesIO()
+            fig.savefig(buffer, **save_kwargs)
+            date = _source_date().strftime('%a %b %d %H:%M:%S %Y').encode('ascii')
+            target.write(re.sub(rb'^%%CreationDate: .*$', b'%%CreationDate: ' + date,
+                                buffer.getvalue(), count=1, flags=re.MULTILINE))
+        elif deterministic and fmt == 'svg':
+            with _svg_hashsalt():
+                fig.savefig(target, **save_kwargs)
+        else:
+            fig.savefig(target, **save_kwargs)
+    except ValueError as e:
+        if save_kwargs['format'] == 'pgf' and 'raster' in str(e):
+            raise ValueError(
+                "PGF figures with images (imshow, rasterized artists) write them as "
+                "separate -img<N>.png files and need a file path, not a stream") from e
+        raise
+
+
+def _warn_raster_only(fig: plt.Figure, formats: List[str]) -> None:
+    """Warn when a figure made of raster images is saved to vector formats."""
+    vector = [fmt for fmt in formats if fmt in VECTOR_FORMATS]
+    if getattr(fig, 'raster_only', False) and vector:
+        print(f"Warning: Figure is assembled from raster images; its "
+              f"{', '.join(vector)} output will embed them instead of vector art")
+
+
+def _prewarm_tex(fig: plt.Figure, formats: List[str], dpi: int) -> None:
+    """Compile all LaTeX labels concurrently instead of one LaTeX run per string."""
+    if not plt.rcParams['text.usetex']:
+        return
+    from latex_text import prewarm_tex_cache
+    raster_formats = [fmt for fmt in formats if fmt not in VECTOR_FORMATS]
+    try:
+        prewarm_tex_cache([fig], dpi=dpi if raster_formats else None)
+    except Exception as e:
+        print(f"Warning: Could not prepare LaTeX text ahead of export: {e}")
+
+
+def render_publication_figure(
+    fig: plt.Figure,
+    formats: List[str] = ['pdf', 'png'],
+    dpi: int = 300,
+    transparent: bool = False,
+    bbox_inches: str = 'tight',
+    pad_inches: float = 0.1,
+    facecolor: str = 'white',
+    deterministic: bool = False,
+    **kwargs
+) -> Dict[str, memoryview]:
+    """
+    Render a figure in memory with the settings of save_publication_figure().
+
+    Use this for in-process consumers such as web responses or archive
+    writers, which would otherwise round-trip through temporary files.
+
+    Parameters
+    ----------
+    fig : matplotlib.figure.Figure
+        The figure to render
+    formats, dpi, transparent, bbox_inches, pad_inches, facecolor, deterministic, **kwargs
+        As for save_publication_figure()
+
+    Returns
+    -------
+    dict
+        Mapping of format to the rendered file contents. The memoryviews
+        share the render buffers; use bytes(view) for an independent copy.
+
+    Examples
+    --------
+    >>> rendered = render_publication_figure(fig, formats=['png'], dpi=150)
+    >>> response.body = rendered['png']
+    >>> zip_file.writestr('figure1.pdf', render_publication_figure(fig, ['pdf'])['pdf'])
+    """
+    _warn_raster_only(fig, formats)
+    _prewarm_tex(fig, formats, dpi)
+
+    rendered = {}
+    for fmt in formats:
+        save_kwargs = _savefig_kwargs(fmt, dpi, transparent, bbox_inches, pad_inches,
+                                      facecolor, deterministic, kwargs)
+        buffer = io.BytesIO()
+        _savefig_stream(fig, buffer, save_kwargs, deterministic)
+        rendered[fmt] = buffer.getbuffer()
+
+    return rendered
 
 
 def save_publication_figure(
     fig: plt.Figure,
-    filename: Union[str, Path],
+    filename: Union[str, Path, BinaryIO],
     formats: List[str] = ['pdf', 'png'],
     dpi: int = 300,
     transparent: bool = False,
     bbox_inches: str = 'tight',
     pad_inches: float = 0.1,
     facecolor: str = 'white',
+    deterministic: bool = False,
+    writer: Optional[AtomicWriteBatch] = None,
     **kwargs
-) -> List[Path]:
+) -> List[Union[Path, BinaryIO]]:
     """
     Save a matplotlib figure in multiple formats with publication-quality settings.
 
+    Files are replaced atomically (see AtomicWriteBatch), so concurrent
+    readers never see a partially written figure. Missing output
+    directories are created.
+
     Parameters
     ----------
     fig : matplotlib.figure.Figure
         The figure to save
-    filename : str or Path
-        Base filename (without extension)
+    filename : str, Path or file-like
+        Base filename (without extension), or a binary file-like object
+        to write a single format into
     formats : list of str, default ['pdf', 'png']
-        List of file formats to save. Options: 'pdf', 'png', 'eps', 'svg', 'tiff'
+        List of file formats to save. Options: 'pdf', 'png', 'eps', 'svg', 'tiff',
+        'pgf' (LaTeX-native figure for \\input, typeset by the manuscript itself)
     dpi : int, default 300
         Resolution for raster formats (png, tiff). 300 DPI is minimum for most journals
     transparent : bool, default False
@@ -43,13 +429,21 @@ def save_publication_figure(
         Padding around the figure when bbox_inches='tight'
     facecolor : str, default 'white'
         Background color (ignored if transparent=True)
+    deterministic : bool, default False
+        If True, produce byte-reproducible files: timestamps are pinned to
+        SOURCE_DATE_EPOCH (0 if unset), version strings are stripped, SVG
+        ids use a fixed salt, and files are only rewritten when their bytes
+        change, so unchanged figures do not trigger LaTeX rebuilds
+    writer : AtomicWriteBatch, optional
+        Batch to stage the files in; the caller commits it, e.g. once for
+        many figures. By default the files are committed before returning.
     **kwargs
         Additional keyword arguments passed to fig.savefig()
 
     Returns
     -------
-    list of Path
-        List of paths to saved files
+    list of Path or file-like
+        List of paths to saved files, or ``[filename]`` for a file-like target
 
     Examples
     --------
@@ -57,41 +451,55 @@ def save_publication_figure(
     >>> ax.plot([1, 2, 3], [1, 4, 9])
     >>> save_publication_figure(fig, 'my_plot', formats=['pdf', 'png'], dpi=600)
     ['my_plot.pdf', 'my_plot.png']
+    >>> save_publication_figure(fig, 'my_plot', deterministic=True)
+    >>> save_publication_figure(fig, response_stream, formats=['svg'])
     """
+    if hasattr(filename, 'write'):
+        if len(formats) != 1:
+            raise ValueError(f"A file-like target takes exactly one format, got {len(formats)}")
+        _warn_raster_only(fig, formats)
+        _prewarm_tex(fig, formats, dpi)
+        save_kwargs = _savefig_kwargs(formats[0], dpi, transparent, bbox_inches, pad_inches,
+                                      facecolor, deterministic, kwargs)
+        _savefig_stream(fig, filename, save_kwargs, deterministic)
+        return [filename]
+
     filename = Path(filename)
     base_name = filename.stem
-    output_dir = filename.parent if filename.parent.exists() else Path.cwd()
+    output_dir = filename.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     saved_files = []
+    batch = writer if writer is not None else AtomicWriteBatch()
+
+    _warn_raster_only(fig, formats)
+    _prewarm_tex(fig, formats, dpi)
 
     for fmt in formats:
         output_file = output_dir / f"{base_name}.{fmt}"
-
-        # Set format-specific parameters
-        save_kwargs = {
-            'dpi': dpi,
-            'bbox_inches': bbox_inches,
-            'pad_inches': pad_inches,
-            'facecolor': facecolor if not transparent else 'none',
-            'edgecolor': 'none',
-            'transparent': transparent,
-            'format': fmt,
-        }
-
-        # Update with user-provided kwargs
-        save_kwargs.update(kwargs)
-
-        # Adjust DPI for vector formats (DPI less relevant)
-        if fmt in ['pdf', 'eps', 'svg']:
-            save_kwargs['dpi'] = min(dpi, 300)  # Lower DPI for embedded rasters in vector
+        save_kwargs = _savefig_kwargs(fmt, dpi, transparent, bbox_inches, pad_inches,
+                                      facecolor, deterministic, kwargs)
 
         try:
-            fig.savefig(output_file, **save_kwargs)
+            if fmt == 'pgf':
+                _save_pgf(fig, output_file, save_kwargs, deterministic, batch)
+            elif deterministic:
+                buffer = io.BytesIO()
+                _savefig_stream(fig, buffer, save_kwargs, deterministic)
+                if _file_holds(output_file, buffer.getbuffer()):
+                    print(f"= Unchanged: {output_file}")
+                else:
+                    batch.write(output_file, buffer.getbuffer())
+            else:
+                with batch.open(output_file) as f:
+                    fig.savefig(f, **save_kwargs)
             saved_files.append(output_file)
-            print(f"✓ Saved: {output_file}")
         except Exception as e:
             print(f"✗ Failed to save {output_file}: {e}")
 
+    if writer is None:
+        batch.commit()
+
     return saved_files
 
 
@@ -99,7 +507,8 @@ def save_for_journal(
     fig: plt.Figure,
     filename: Union[str, Path],
     journal: str,
-    figure_type: str = 'combination'
+    figure_type: str = 'combination',
+    deterministic: bool = False
 ) -> List[Path]:
     """
     Save figure with journal-specific requirements.
@@ -114,6 +523,8 @@ def save_for_journal(
         Journal name. Options: 'nature', 'science', 'cell', 'plos', 'acs', 'ieee'
     figure_type : str, default 'combination'
         Type of figure. Options: 'line_art', 'photo', 'combination'
+    deterministic : bool, default False
+        If True, write byte-reproducible files (see save_publication_figure)
 
     Returns
     -------
@@ -128,49 +539,19 @@ def save_for_journal(
     """
     journal = journal.lower()
 
-    # Define journal-specific requirements
-    journal_specs = {
-        'nature': {
-            'line_art': {'formats': ['pdf', 'eps'], 'dpi': 1000},
-            'photo': {'formats': ['tiff'], 'dpi': 300},
-            'combination': {'formats': ['pdf'], 'dpi': 600},
-        },
-        'science': {
-            'line_art': {'formats': ['eps', 'pdf'], 'dpi': 1000},
-            'photo': {'formats': ['tiff'], 'dpi': 300},
-            'combination': {'formats': ['eps'], 'dpi': 600},
-        },
-        'cell': {
-            'line_art': {'formats': ['pdf', 'eps'], 'dpi': 1000},
-            'photo': {'formats': ['tiff'], 'dpi': 300},
-            'combination': {'formats': ['pdf'], 'dpi': 600},
-        },
-        'plos': {
-            'line_art': {'formats': ['pdf', 'eps'], 'dpi': 600},
-            'photo': {'formats': ['tiff', 'png'], 'dpi': 300},
-            'combination': {'formats': ['tiff'], 'dpi': 300},
-        },
-        'acs': {
-            'line_art': {'formats': ['tiff', 'pdf'], 'dpi': 600},
-            'photo': {'formats': ['tiff'], 'dpi': 300},
-            'combination': {'formats': ['tiff'], 'dpi': 600},
-        },
-        'ieee': {
-            'line_art': {'formats': ['pdf', 'eps'], 'dpi': 600},
-            'photo': {'formats': ['tiff'], 'dpi': 300},
-            'combination': {'formats': ['pdf'], 'dpi': 300},
-        },
-    }
-
-    if journal not in journal_specs:
-        available = ', '.join(journal_specs.keys())
+    if journal not in JOURNAL_EXPORT_SPECS:
+        available = ', '.join(JOURNAL_EXPORT_SPECS.keys())
         raise ValueError(f"Journal '{journal}' not recognized. Available: {available}")
 
-    if figure_type not in journal_specs[journal]:
-        available = ', '.join(journal_specs[journal].keys())
+    if figure_type not in JOURNAL_EXPORT_SPECS[journal]:
+        available = ', '.join(JOURNAL_EXPORT_SPECS[journal].keys())
         raise ValueError(f"Figure type '{figure_type}' not valid. Available: {available}")
 
-    specs = journal_specs[journal][figure_type]
+    if figure_type == 'line_art' and getattr(fig, 'raster_only', False):
+        raise ValueError("Figure is assembled from raster images and cannot be saved as "
+                         "line art; use figure_type='photo' or 'combination'")
+
+    specs = JOURNAL_EXPORT_SPECS[journal][figure_type]
 
     print(f"Saving for {journal.upper()} ({figure_type}):")
     print(f"  Formats: {', '.join(specs['formats'])}")
@@ -180,7 +561,8 @@ def save_for_journal(
         fig=fig,
         filename=filename,
         formats=specs['formats'],
-        dpi=specs['dpi']
+        dpi=specs['dpi'],
+        deterministic=deterministic
     )
 
 
@@ -213,20 +595,11 @@ def check_figure_size(fig: plt.Figure, journal: str = 'nature') -> dict:
     width_mm = width_inches * 25.4
     height_mm = height_inches * 25.4
 
-    # Journal specifications (widths in mm)
-    specs = {
-        'nature': {'single': 89, 'double': 183, 'max_height': 247},
-        'science': {'single': 55, 'double': 175, 'max_height': 233},
-        'cell': {'single': 85, 'double': 178, 'max_height': 230},
-        'plos': {'single': 83, 'double': 173, 'max_height': 233},
-        'acs': {'single': 82.5, 'double': 178, 'max_height': 247},
-    }
-
-    if journal not in specs:
-        journal_spec = specs['nature']
+    if journal not in JOURNAL_SIZE_SPECS:
+        journal_spec = JOURNAL_SIZE_SPECS['nature']
         print(f"Warning: Journal '{journal}' not found, using Nature specifications")
     else:
-        journal_spec = specs[journal]
+        journal_spec = JOURNAL_SIZE_SPECS[journal]
 
     # Determine column type
     column_type = None
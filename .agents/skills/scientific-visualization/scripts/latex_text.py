@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+LaTeX Text Rendering for Publication-Ready Scientific Figures
+
+This module matches figure typography to the manuscript templates in
+``_templates/`` and speeds up ``text.usetex`` exports. Matplotlib compiles
+each distinct label with its own LaTeX (and dvipng) run while drawing, one
+after another. The helpers here collect every string of a figure or a whole
+batch up front, deduplicate them and compile them concurrently into
+matplotlib's TeX cache, which is keyed by a hash of the full TeX source and
+persists across runs. The draw that follows then only reads cached output.
+"""
+
+import os
+import matplotlib.pyplot as plt
+import matplotlib.text
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.texmanager import TexManager
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+
+# Location of the manuscript templates relative to this script
+TEMPLATES_DIR = Path(__file__).resolve().parents[4] / '_templates'
+
+# Preamble packages that affect how figure text is typeset. Layout, table,
+# bibliography and hyperlink packages are left out of figure preambles.
+TEXT_PACKAGES = ('fontenc', 'tgtermes', 'amsmath', 'amssymb', 'siunitx')
+
+# Default number of concurrent LaTeX processes in prewarm_tex_cache(); None
+# means one per CPU. Batch export workers set their share of the CPUs here.
+MAX_TEX_PROCESSES: Optional[int] = None
+
+
+def load_manuscript_preamble(
+    template: str = 'essay',
+    templates_dir: Optional[Union[str, Path]] = None
+) -> str:
+    """
+    Extract the text-related packages from a manuscript preamble.
+
+    Parameters
+    ----------
+    template : str, default 'essay'
+        Template name. Options: 'essay', 'paper', 'book', 'patent', or a
+        path to any preamble .tex file
+    templates_dir : str or Path, optional
+        Directory holding ``<template>-preamble.tex`` (default: the
+        repository's ``_templates`` directory)
+
+    Returns
+    -------
+    str
+        Preamble lines suitable for ``text.latex.preamble`` and ``pgf.preamble``
+
+    Examples
+    --------
+    >>> load_manuscript_preamble('paper')
+    '\\\\usepackage[T1]{fontenc}\\n\\\\usepackage{tgtermes}\\n...'
+    """
+    preamble_file = Path(template)
+    if preamble_file.suffix != '.tex':
+        preamble_file = Path(templates_dir or TEMPLATES_DIR) / f"{template}-preamble.tex"
+
+    if not preamble_file.exists():
+        raise ValueError(f"Preamble '{preamble_file}' not found")
+
+    lines = []
+    for line in preamble_file.read_text(encoding='utf-8').splitlines():
+        line = line.split('%', 1)[0].strip()
+        if not line.startswith(r'\usepackage'):
+            continue
+        packages = line[line.index('{') + 1:line.rindex('}')]
+        if any(package.strip() in TEXT_PACKAGES for package in packages.split(',')):
+            lines.append(line)
+
+    return '\n'.join(lines)
+
+
+def configure_latex_text(
+    template: str = 'essay',
+    templates_dir: Optional[Union[str, Path]] = None,
+    texsystem: str = 'pdflatex'
+) -> None:
+    """
+    Render figure text with LaTeX using a manuscript's preamble.
+
+    Sets up both ``text.usetex`` (used by the pdf, eps and raster backends)
+    and the PGF backend, so either path produces text matching the document.
+
+    Parameters
+    ----------
+    template : str, default 'essay'
+        Manuscript template (see load_manuscript_preamble)
+    templates_dir : str or Path, optional
+        Directory holding the preamble templates
+    texsystem : str, default 'pdflatex'
+        TeX engine for the PGF backend: 'pdflatex', 'xelatex' or 'lualatex'
+
+    Examples
+    --------
+    >>> configure_latex_text('paper')
+    >>> fig, ax = plt.subplots()
+    >>> ax.set_xlabel(r'Time (\\si{\\second})')
+    >>> save_publication_figure(fig, 'figure1', formats=['pgf', 'pdf'])
+    """
+    preamble = load_manuscript_preamble(template, templates_dir)
+
+    plt.rcParams.update({
+        'text.usetex': True,
+        'text.latex.preamble': preamble,
+        'font.family': 'serif',
+        'pgf.texsystem': texsystem,
+        'pgf.rcfonts': False,
+        'pgf.preamble': preamble,
+    })
+    print(f"✓ Configured LaTeX text rendering with the '{template}' preamble")
+
+
+def collect_tex_strings(figures: Iterable[plt.Figure]) -> Set[Tuple[str, float]]:
+    """
+    Collect every TeX string drawn by a set of figures.
+
+    Tick labels are generated from the current limits and formatters
+    without drawing, so no LaTeX run is triggered.
+
+    Parameters
+    ----------
+    figures : iterable of matplotlib.figure.Figure
+        Figures to inspect
+
+    Returns
+    -------
+    set of (str, float)
+        Distinct (TeX string, font size in points) pairs
+    """
+    strings = set()
+
+    for fig in figures:
+        for ax in fig.get_axes():
+            for axis in (ax.xaxis, ax.yaxis):
+                axis.get_majorticklabels()
+                axis.get_minorticklabels()
+
+        for text in fig.findobj(matplotlib.text.Text):
+            if not text.get_visible() or not text.get_usetex():
+                continue
+            content = text.get_text()
+            if not content:
+                continue
+
+            fontsize = text.get_fontsize()
+            # Text layout measures 'lp' once per font size for line spacing.
+            strings.add(('lp', fontsize))
+            for line in content.split('\n'):
+                strings.add((line if line != ' ' else r'\ ', fontsize))
+
+    return strings
+
+
+def prewarm_tex_cache(
+    figures: Iterable[plt.Figure],
+    dpi: Optional[Union[int, Iterable[int]]] = None,
+    max_workers: Optional[int] = None
+) -> int:
+    """
+    Compile all TeX strings of one or more figures into the TeX cache.
+
+    Strings already in the cache (from this or earlier runs) are skipped by
+    matplotlib; the rest are compiled concurrently instead of one at a time
+    during drawing.
+
+    Parameters
+    ----------
+    figures : iterable of matplotlib.figure.Figure
+        Figures to prepare, typically a whole export batch
+    dpi : int or list of int, optional
+        Raster resolutions to prepare glyph bitmaps for (png, tiff). Vector
+        formats only need the DVI output and can leave this unset.
+    max_workers : int, optional
+        Number of concurrent LaTeX processes (default: MAX_TEX_PROCESSES,
+        or the number of CPUs)
+
+    Returns
+    -------
+    int
+        Number of distinct strings prepared
+
+    Examples
+    --------
+    >>> prewarm_tex_cache([fig1, fig2, fig3], dpi=600)
+    >>> save_publication_figure(fig1, 'figure1', formats=['pdf', 'png'], dpi=600)
+    """
+    strings = collect_tex_strings(figures)
+    if dpi is None:
+        resolutions: List[int] = []
+    elif isinstance(dpi, (int, float)):
+        resolutions = [dpi]
+    else:
+        resolutions = list(dpi)
+
+    def compile_string(item):
+        tex, fontsize = item
+        TexManager.make_dvi(tex, fontsize)
+        for resolution in resolutions:
+            TexManager.make_png(tex, fontsize, resolution)
+
+    if max_workers is None:
+        max_workers = MAX_TEX_PROCESSES or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() surfaces the first LaTeX error, if any
+        list(executor.map(compile_string, strings))
+
+    return len(strings)
+
+
+if __name__ == "__main__":
+    # Example usage
+    import numpy as np
+    from figure_export import save_publication_figure
+
+    configure_latex_text('essay')
+
+    fig, ax = plt.subplots(figsize=(3.5, 2.5))
+    x = np.linspace(0, 10, 100)
+    ax.plot(x, np.sin(x), label=r'$\sin(x)$')
+    ax.set_xlabel(r'Time (\si{\second})')
+    ax.set_ylabel(r'Amplitude (\si{\milli\volt})')
+    ax.legend()
+
+    print(f"Prepared {prewarm_tex_cache([fig], dpi=300)} TeX strings")
+    save_publication_figure(fig, 'example_latex_text', formats=['pdf', 'pgf', 'png'], dpi=300)
+
+    plt.close(fig)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Multi-Panel Figure Composer for Publication-Ready Scientific Figures
+
+This module builds multi-panel figures from independently rendered panels.
+Each panel is drawn in its own worker process at its final size on the
+journal's column grid and cached as a PNG fragment. Changing one panel
+re-renders only that panel; the others are read back from the cache and
+assembled with panel labels into the final figure. The composed figure is
+raster-only: export it to TIFF or PNG, not as vector line art.
+"""
+
+import hashlib
+import inspect
+import os
+import matplotlib.pyplot as plt
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from string import ascii_lowercase, ascii_uppercase
+from typing import Any, Dict, List, Optional, Union
+
+from batch_export import _hash_value, _init_worker
+from style_presets import configure_for_journal
+
+
+def _panel_key(panel: Dict[str, Any], layout: Dict[str, Any]) -> str:
+    """Cache key of a panel: its code, data, style and size."""
+    digest = hashlib.blake2b(digest_size=16)
+    plot_func = panel['plot_func']
+    digest.update(f"{plot_func.__module__}.{plot_func.__qualname__}".encode())
+    try:
+        digest.update(inspect.getsource(plot_func).encode())
+    except (OSError, TypeError):
+        pass
+    _hash_value(panel.get('data', {}), digest)
+    _hash_value(panel.get('style', {}), digest)
+    _hash_value(layout, digest)
+    return digest.hexdigest()
+
+
+def _render_panel(
+    panel: Dict[str, Any],
+    layout: Dict[str, Any],
+    fragment: str
+) -> str:
+    """Render one panel at its final size into an image fragment."""
+    with plt.rc_context():
+        configure_for_journal(layout['journal'], figure_width=layout['figure_width'])
+        plt.rcParams.update(panel.get('style', {}))
+
+        fig = plt.figure(figsize=layout['size'])
+        try:
+            ax = fig.add_subplot()
+            panel['plot_func'](ax, **panel.get('data', {}))
+
+            tmp_fragment = f"{fragment}.{os.getpid()}.tmp"
+            fig.savefig(tmp_fragment, format='png', dpi=layout['dpi'], bbox_inches=None,
+                        facecolor='white', edgecolor='none')
+            os.replace(tmp_fragment, fragment)
+        finally:
+            plt.close(fig)
+
+    return fragment
+
+
+def compose_panels(
+    panels: List[Dict[str, Any]],
+    journal: str = 'nature',
+    figure_width: str = 'double',
+    ncols: int = 2,
+    row_height_mm: Optional[float] = None,
+    dpi: int = 600,
+    cache_dir: Union[str, Path] = '.panel_cache',
+    max_workers: Optional[int] = None,
+    label_case: Optional[str] = None
+) -> plt.Figure:
+    """
+    Compose a multi-panel figure from independently rendered, cached panels.
+
+    Parameters
+    ----------
+    panels : list of dict
+        One dict per panel with the keys:
+
+        - 'plot_func': module-level function ``plot_func(ax, **data)`` that
+          draws the panel into the given axes
+        - 'data': dict of keyword arguments passed to ``plot_func``
+        - 'row', 'col': optional grid position (default: next free cell)
+        - 'rowspan', 'colspan': optional number of grid cells (default 1)
+        - 'style': optional rcParams applied on top of the journal style
+    journal : str, default 'nature'
+        Journal whose column width and style are used (see configure_for_journal)
+    figure_width : str, default 'double'
+        Figure width: 'single' or 'double' column
+    ncols : int, default 2
+        Number of grid columns across the figure width
+    row_height_mm : float, optional
+        Height of one grid row (default: 3:4 aspect of one grid cell)
+    dpi : int, default 600
+        Resolution of the panel fragments; export the composed figure at
+        the same DPI. Use at least the journal's line-art DPI for panels
+        with thin lines or small text.
+    cache_dir : str or Path, default '.panel_cache'
+        Directory holding rendered panel fragments
+    max_workers : int, optional
+        Number of processes rendering changed panels in parallel
+    label_case : str, optional
+        'lower' or 'upper' panel labels (default: lowercase for Nature,
+        uppercase otherwise)
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The composed figure, ready for save_publication_figure(). Its panels
+        are raster images, so the figure is marked ``raster_only``:
+        save_publication_figure() warns when it is saved to vector formats
+        and save_for_journal() rejects figure_type='line_art'.
+
+    Examples
+    --------
+    >>> def plot_time_course(ax, time, values):
+    ...     ax.plot(time, values)
+    ...     ax.set_xlabel('Time (h)')
+    >>> panels = [
+    ...     {'plot_func': plot_time_course, 'data': {'time': t, 'values': y}, 'colspan': 2},
+    ...     {'plot_func': plot_bars, 'data': {'values': v}},
+    ...     {'plot_func': plot_heatmap, 'data': {'matrix': m}},
+    ... ]
+    >>> fig = compose_panels(panels, journal='nature', figure_width='double')
+    >>> save_publication_figure(fig, 'figure2', formats=['tiff', 'png'], dpi=600)
+    """
+    # Read the journal's size and font without changing the caller's style
+    with plt.rc_context():
+        configure_for_journal(journal, figure_width=figure_width)
+        width_inches = plt.rcParams['figure.figsize'][0]
+        label_size = plt.rcParams['font.size'] + 2
+    cell_width = width_inches / ncols
+    cell_height = row_height_mm / 25.4 if row_height_mm else cell_width * 0.75
+
+    # Place panels on the grid, filling free cells row by row
+    occupied = set()
+    placements = []
+    cursor = 0
+    for panel in panels:
+        rowspan, colspan = panel.get('rowspan', 1), panel.get('colspan', 1)
+        if colspan > ncols:
+            raise ValueError(f"Panel spans {colspan} columns but the grid has {ncols}")
+
+        if 'row' in panel and 'col' in panel:
+            row, col = panel['row'], panel['col']
+        else:
+            while True:
+                row, col = divmod(cursor, ncols)
+                cells = {(r, c) for r in range(row, row + rowspan)
+                         for c in range(col, col + colspan)}
+                if col + colspan <= ncols and not cells & occupied:
+                    break
+                cursor += 1
+
+        cells = {(r, c) for r in range(row, row + rowspan) for c in range(col, col + colspan)}
+        if cells & occupied:
+            raise ValueError(f"Panel at row {row}, column {col} overlaps another panel")
+        occupied |= cells
+        placements.append((row, col, rowspan, colspan))
+
+    nrows = max(row + rowspan for row, _, rowspan, _ in placements)
+
+    # Render panels whose code, data, style or size changed
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    fragments = []
+    pending = []
+    for panel, (row, col, rowspan, colspan) in zip(panels, placements):
+        layout = {
+            'journal': journal,
+            'figure_width': figure_width,
+            'size': (colspan * cell_width, rowspan * cell_height),
+            'dpi': dpi,
+        }
+        fragment = cache_dir / f"{_panel_key(panel, layout)}.png"
+        fragments.append(fragment)
+        if not fragment.exists():
+            pending.append((panel, layout, str(fragment)))
+
+    print(f"Composing {len(panels)} panel(s): {len(pending)} to render, "
+          f"{len(panels) - len(pending)} cached")
+
+    if len(pending) == 1:
+        _render_panel(*pending[0])
+    elif pending:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_render_panel, *job) for job in pending]
+            for future in futures:
+                future.result()
+
+    # Assemble the fragments on the grid
+    fig = plt.figure(figsize=(width_inches, nrows * cell_height),
+                     dpi=dpi, layout='none')
+    fig.raster_only = True
+
+    if label_case is None:
+        label_case = 'lower' if journal.lower() == 'nature' else 'upper'
+    letters = ascii_lowercase if label_case == 'lower' else ascii_uppercase
+
+    for i, (fragment, (row, col, rowspan, colspan)) in enumerate(zip(fragments, placements)):
+        left = col / ncols
+        bottom = 1 - (row + rowspan) / nrows
+        ax = fig.add_axes((left, bottom, colspan / ncols, rowspan / nrows))
+        ax.imshow(plt.imread(fragment), interpolation='none', aspect='auto')
+        ax.set_axis_off()
+
+        fig.text(left + 0.005, 1 - row / nrows - 0.005, letters[i % len(letters)],
+                 fontsize=label_size, fontweight='bold',
+                 ha='left', va='top')
+
+    return fig
+
+
+def _example_time_course(ax: plt.Axes, time: np.ndarray, values: np.ndarray) -> None:
+    """Example panel used by the __main__ demo."""
+    ax.plot(time, values)
+    ax.set_xlabel('Time (h)')
+    ax.set_ylabel('Growth (OD$_{600}$)')
+
+
+def _example_heatmap(ax: plt.Axes, matrix: np.ndarray) -> None:
+    """Example panel used by the __main__ demo."""
+    ax.imshow(matrix, cmap='viridis', aspect='auto')
+    ax.set_xlabel('Sample')
+    ax.set_ylabel('Gene')
+
+
+if __name__ == "__main__":
+    # Example usage
+    from figure_export import save_publication_figure
+
+    rng = np.random.default_rng(0)
+    time = np.linspace(0, 48, 100)
+
+    panels = [
+        {'plot_func': _example_time_course,
+         'data': {'time': time, 'values': np.exp(-time / 20)}, 'colspan': 2},
+        {'plot_func': _example_heatmap, 'data': {'matrix': rng.standard_normal((8, 6))}},
+        {'plot_func': _example_heatmap, 'data': {'matrix': rng.standard_normal((8, 6))}},
+    ]
+
+    fig = compose_panels(panels, journal='nature', figure_width='double', dpi=300)
+    save_publication_figure(fig, 'example_composed', formats=['png'], dpi=300)
+
+    # Changing one panel re-renders only that panel
+    panels[1]['data'] = {'matrix': rng.standard_normal((8, 6))}
+    fig = compose_panels(panels, journal='nature', figure_width='double', dpi=300)
+    plt.close(fig)
@@ -6,9 +6,15 @@ This module provides pre-configured matplotlib styles optimized for
 different journals and use cases.
 """
 
+import hashlib
+import json
+import os
+import sys
 import matplotlib.pyplot as plt
 import matplotlib as mpl
-from typing import Optional, Dict, Any
+from matplotlib import font_manager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Sequence
 
 
 # Okabe-Ito colorblind-friendly palette
@@ -31,6 +37,14 @@ TOL_HIGH_CONTRAST = ['#004488', '#DDAA33', '#BB5566']
 # Wong palette
 WONG_COLORS = ['#000000', '#E69F00', '#56B4E9', '#009E73', '#F0E442', '#0072B2', '#D55E00', '#CC79A7']
 
+# Persisted font stack resolutions, keyed by the fonts installed on disk
+FONT_RESOLUTION_FILE = Path(mpl.get_cachedir()) / 'publication-fonts.json'
+
+PUBLICATION_STYLES = ['default', 'nature', 'science', 'cell', 'minimal', 'presentation']
+
+# Font set identity of this process, see _font_set_key()
+_FONT_SET_KEY: Optional[str] = None
+
 
 def get_base_style() -> Dict[str, Any]:
     """
@@ -108,7 +122,7 @@ def get_base_style() -> Dict[str, Any]:
     }
 
 
-def apply_publication_style(style_name: str = 'default') -> None:
+def apply_publication_style(style_name: str = 'default', resolve_fonts: bool = True) -> None:
     """
     Apply a pre-configured publication style.
 
@@ -122,6 +136,9 @@ def apply_publication_style(style_name: str = 'default') -> None:
         - 'cell': Cell Press style
         - 'minimal': Minimal clean style
         - 'presentation': Larger fonts for presentations
+    resolve_fonts : bool, default True
+        Replace the font stack by the installed fonts it resolves to (see
+        resolve_font_stack), avoiding font fallback searches and warnings
 
     Examples
     --------
@@ -187,6 +204,10 @@ def apply_publication_style(style_name: str = 'default') -> None:
     elif style_name != 'default':
         print(f"Warning: Style '{style_name}' not recognized. Using 'default'.")
 
+    if resolve_fonts:
+        resolution = resolve_font_stack(base_style['font.sans-serif'])
+        base_style['font.sans-serif'] = resolution['available']
+
     # Apply the style
     plt.rcParams.update(base_style)
     print(f"✓ Applied '{style_name}' publication style")
@@ -372,6 +393,203 @@ def reset_to_default() -> None:
     print("✓ Reset to matplotlib defaults")
 
 
+def _font_directories() -> List[str]:
+    """Directories matplotlib and fontconfig search for fonts on this platform."""
+    directories = [str(Path(mpl.get_data_path()) / 'fonts' / 'ttf')]
+    if sys.platform == 'win32':
+        directories += [font_manager.win32FontDirectory(), *font_manager.MSUserFontDirectories]
+    elif sys.platform == 'darwin':
+        directories += [*font_manager.OSXFontDirectories, *font_manager.X11FontDirectories]
+    else:
+        directories += font_manager.X11FontDirectories
+    return directories
+
+
+def _font_set_key() -> str:
+    """
+    Identity of the installed fonts and matplotlib's font cache.
+
+    Uses the modification times of the font directories (which change when
+    fonts are added or removed) and of matplotlib's font list, so no font
+    file is opened or listed through fontconfig. Computed once per process.
+    """
+    global _FONT_SET_KEY
+    if _FONT_SET_KEY is not None:
+        return _FONT_SET_KEY
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(mpl.__version__.encode())
+
+    cache_file = Path(mpl.get_cachedir()) / f"fontlist-v{font_manager.FontManager.__version__}.json"
+    for path in [str(cache_file), *_font_directories()]:
+        for root, _, _ in os.walk(path) if os.path.isdir(path) else [(path, None, None)]:
+            try:
+                digest.update(f"{root}\0{os.stat(root).st_mtime_ns}\n".encode())
+            except OSError:
+                continue
+
+    _FONT_SET_KEY = digest.hexdigest()
+    return _FONT_SET_KEY
+
+
+def _load_font_resolutions() -> Dict[str, Any]:
+    """Read the persisted font stack resolutions."""
+    try:
+        return json.loads(FONT_RESOLUTION_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def prewarm_font_cache() -> int:
+    """
+    Make matplotlib's font cache cover every font installed on disk.
+
+    Fonts installed after matplotlib built its cache are added and the
+    cache file is rewritten, so later processes load it instead of
+    rebuilding it.
+
+    Returns
+    -------
+    int
+        Number of fonts added to the cache
+
+    Examples
+    --------
+    >>> prewarm_font_cache()  # e.g. once per render node after installing fonts
+    """
+    known = {entry.fname for entry in font_manager.fontManager.ttflist}
+    known.update(entry.fname for entry in font_manager.fontManager.afmlist)
+
+    added = 0
+    for path in font_manager.findSystemFonts():
+        if path not in known:
+            try:
+                font_manager.fontManager.addfont(path)
+                added += 1
+            except (OSError, RuntimeError, ValueError):
+                continue
+
+    cache_file = Path(mpl.get_cachedir()) / f"fontlist-v{font_manager.FontManager.__version__}.json"
+    if added or not cache_file.exists():
+        font_manager.json_dump(font_manager.fontManager, cache_file)
+    return added
+
+
+def resolve_font_stack(families: Sequence[str], generic: str = 'sans-serif') -> Dict[str, Any]:
+    """
+    Resolve a font stack to the installed fonts it will use.
+
+    The result is persisted next to matplotlib's font cache, keyed by the
+    installed fonts, so later processes reuse it without searching until
+    fonts are added or removed (or matplotlib rebuilds its font list).
+
+    Parameters
+    ----------
+    families : sequence of str
+        Font families in order of preference, e.g. rcParams['font.sans-serif']
+    generic : str, default 'sans-serif'
+        Generic family used if none of the families is installed
+
+    Returns
+    -------
+    dict
+        'family' and 'file' of the font used, 'available' (installed
+        families in stack order, starting with the resolved one) and
+        'missing' (families that are not installed)
+
+    Examples
+    --------
+    >>> resolve_font_stack(['Arial', 'Helvetica', 'DejaVu Sans'])
+    {'family': 'DejaVu Sans', 'file': '.../DejaVuSans.ttf',
+     'available': ['DejaVu Sans'], 'missing': ['Arial', 'Helvetica']}
+    """
+    global _FONT_SET_KEY
+    key = _font_set_key()
+    stack = ', '.join(families)
+    resolutions = _load_font_resolutions()
+    cached = resolutions.get(key, {}).get(stack)
+    if cached is not None and os.path.exists(cached['file']):
+        return cached
+
+    # Rebuilding matplotlib's font list changes the key, so compute it afterwards
+    prewarm_font_cache()
+    _FONT_SET_KEY = None
+    key = _font_set_key()
+
+    available, missing, files = [], [], {}
+    for family in families:
+        try:
+            files[family] = font_manager.findfont(
+                font_manager.FontProperties(family=family), fallback_to_default=False)
+            available.append(family)
+        except ValueError:
+            missing.append(family)
+
+    if not available:
+        path = font_manager.findfont(font_manager.FontProperties(family=[generic]))
+        family = font_manager.get_font(path).family_name
+        available.append(family)
+        files[family] = path
+
+    resolution = {
+        'family': available[0],
+        'file': files[available[0]],
+        'available': available,
+        'missing': missing,
+    }
+
+    # Drop resolutions made for a different set of fonts
+    resolutions = {key: {**resolutions.get(key, {}), stack: resolution}}
+    tmp_file = FONT_RESOLUTION_FILE.with_name(f".{FONT_RESOLUTION_FILE.name}.{os.getpid()}.tmp")
+    try:
+        FONT_RESOLUTION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file.write_text(json.dumps(resolutions, indent=2) + '\n', encoding='utf-8')
+        os.replace(tmp_file, FONT_RESOLUTION_FILE)
+    except OSError:
+        pass  # Read-only cache directory: resolve again next time
+
+    return resolution
+
+
+def font_report(style_files: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Report which installed font each style preset resolves to.
+
+    Parameters
+    ----------
+    style_files : list of str, optional
+        .mplstyle files to include (default: the files in ../assets)
+
+    Returns
+    -------
+    dict
+        Mapping of preset name to its resolve_font_stack() result
+
+    Examples
+    --------
+    >>> report = font_report()
+    >>> report['nature']['family']
+    'DejaVu Sans'
+    """
+    stacks = {name: get_base_style()['font.sans-serif'] for name in PUBLICATION_STYLES}
+
+    if style_files is None:
+        style_files = sorted(str(p) for p in (Path(__file__).parent.parent / 'assets').glob('*.mplstyle'))
+    for style_file in style_files:
+        params = mpl.rc_params_from_file(style_file, use_default_template=False)
+        if 'font.sans-serif' in params:
+            stacks[Path(style_file).name] = params['font.sans-serif']
+
+    report = {name: resolve_font_stack(stack) for name, stack in stacks.items()}
+
+    print("Font resolution per preset:")
+    for name, resolution in report.items():
+        missing = f" (missing: {', '.join(resolution['missing'])})" if resolution['missing'] else ''
+        print(f"  {name:24s} → {resolution['family']}: {resolution['file']}{missing}")
+
+    return report
+
+
 if __name__ == "__main__":
     print("Matplotlib Style Presets for Scientific Figures")
     print("=" * 50)
@@ -392,6 +610,9 @@ if __name__ == "__main__":
     print("  - tol_muted")
     print("  - tol_high_contrast")
 
+    print()
+    font_report()
+
     print("\nExample usage:")
     print("  from style_presets import apply_publication_style, set_color_palette")
     print("  apply_publication_style('nature')")